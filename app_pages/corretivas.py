@@ -6,6 +6,7 @@ import pandas as pd
 from components import titulo_page
 from datetime import datetime
 from st_aggrid import AgGrid, GridOptionsBuilder
+from utils.armazenamento import ler_base
 from utils.tools import aggrid_ptbr, remover_acentos
 
 PORTUGUESE_TEXTS = aggrid_ptbr()
@@ -17,10 +18,13 @@ def colorir_status(value):
         return f"color: {cores[value]}; font-weight: bold;"
     return ""
 
-def carregar_dados(path_csv='dados/DBCorretivas.csv'):
-    df = pd.read_csv(path_csv, encoding='utf-8')
-    df['Data/Hora Abertura'] = pd.to_datetime(df['Data/Hora Abertura'], errors='coerce')
-    df['Data/Hora Término'] = pd.to_datetime(df['Data/Hora Término'], errors='coerce')
+COLUNAS_CORRETIVAS = [
+    'Nº OS', 'STATUS', 'NATUREZA', 'TIPO DE OS', 'SOLICITANTE', 'DESCRIÇÃO', 'TECNICO', 'EQUIPE',
+    'Data/Hora Abertura', 'Data/Hora Início', 'Data/Hora Término', 'Atendimento', 'Solução', 'Execução'
+]
+
+def carregar_dados():
+    df = ler_base('DBCorretivas', colunas=COLUNAS_CORRETIVAS)
     df['Referência'] = df['Data/Hora Abertura'].dt.strftime('%Y-%m')
     df['Ref_Abertura'] = df['Data/Hora Abertura'].dt.strftime('%Y-%m')
     df['Ref_Termino'] = df['Data/Hora Término'].dt.strftime('%Y-%m')
@@ -1,12 +1,14 @@
-from utils.tools import gerar_referencia, filtrar_por_referencia, carregar_dados_csv, carregar_dados_excel
+from utils.tools import gerar_referencia, filtrar_por_referencia, carregar_dados_excel
+from utils.armazenamento import ler_base, versao_snapshot
 import streamlit as st
 from streamlit_extras.metric_cards import style_metric_cards
-import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
 import plotly.graph_objs as go
 from components import titulo_page
-from metricas import metricascorretivas, hist_natureza, hist_tipo
+from utils.graph_tools import figura_em_cache
+from utils.indicadores import (TODAS_EQUIPES, COLUNAS_INDICADORES, cubo_indicadores, ler_cubo, equipes_cubo,
+                               indicadores_da_equipe)
 
 # Constantes de estilo
 def get_border_config():
@@ -17,10 +19,19 @@ def get_border_config():
     }
 
 # Utilitários de carregamento de dados
+# A versão do snapshot entra na chave do cache: uma ingestão publicada invalida os dados em memória
 @st.cache_data
-def carregar_dados():
-    return carregar_dados_csv("dados/DBCorretivas.csv",
-                            parse_dates=["Data/Hora Abertura", "Data/Hora Início", "Data/Hora Término"])
+def carregar_cubo(versao: str):
+    cubo = ler_cubo()
+    if cubo is None:
+        # Snapshot gravado antes do cubo de indicadores: calcula a partir da base
+        cubo = cubo_indicadores(ler_base('DBCorretivas', colunas=COLUNAS_INDICADORES))
+    return cubo
+
+# Cada equipe é uma fatia do cubo, calculada uma vez por snapshot
+@st.cache_data
+def carregar_indicadores(versao: str, equipe: str):
+    return indicadores_da_equipe(carregar_cubo(versao), equipe)
 
 # Gráficos
 
@@ -48,19 +59,26 @@ def criar_grafico_linhas(df, categorias, titulo):
     )
     return fig
 
+def estilo_bordas():
+    # Uma regra só para todos os gráficos com borda (contêineres com chave "borda-...")
+    border = get_border_config()
+    st.markdown(f"""
+        <style>
+        div[class*="st-key-borda-"] {{
+            border: {border['width']} solid {border['color']}; border-radius: {border['radius']};
+            padding: 15px; margin-bottom: 20px;
+        }}
+        </style>
+    """, unsafe_allow_html=True)
+
 def exibir_com_borda(fig, usar_borda=True, key="grafico", fullscreen_state_key="fullscreen"):
-    html_fig = fig.to_html(full_html=False, include_plotlyjs='cdn')
-    if st.session_state.get(fullscreen_state_key, False):
-        st.plotly_chart(fig, use_container_width=True)
-    elif usar_borda:
-        border = get_border_config()
-        components.html(f"""
-            <div style="border: {border['width']} solid {border['color']}; border-radius: {border['radius']}; padding: 15px; margin-bottom: 20px;">
-                {html_fig}
-            </div>
-        """, height=500)
+    # Renderização nativa (plotly.js do próprio Streamlit, carregado uma vez por página): só o
+    # JSON da figura vai para o navegador, sem iframe nem CDN
+    if usar_borda and not st.session_state.get(fullscreen_state_key, False):
+        with st.container(key=f"borda-{key}"):
+            st.plotly_chart(fig, theme=None, key=key)
     else:
-        components.html(html_fig, height=500)
+        st.plotly_chart(fig, theme=None, key=key)
 
 def grafico_barra_tipo(df, referencia):
     df = df.copy()
@@ -98,75 +116,95 @@ def grafico_percentual(df):
 
 # Dashboard principal
 
-def dashboard(df):
-    st.markdown(titulo_page('Dashboard', ''), unsafe_allow_html=True)
-    # -----------------------------------------------
-    # Filtragem por Equipe
-    equipe_opcao = st.sidebar.selectbox('Equipe', ['TODOS'] + sorted(df['EQUIPE'].dropna().unique(), reverse=True))
-    if equipe_opcao != 'TODOS':
-        df = df[df['EQUIPE'] == equipe_opcao]
-
-    metricas_df = metricascorretivas(df)
-    natureza_df = hist_natureza(df)
-    tipo_df = hist_tipo(df)
-    print(metricas_df)
-    
-    # Filtra por data do Mês
-    for data in [metricas_df, natureza_df, tipo_df]:
-        data['Referência'] = data['Referência'].astype(str)
+NATUREZA_COLS = ['ACOMPANHAMENTO', 'CORRETIVA EMERGENCIAL', 'CORRETIVA PLANEJADA', 'OBRA E MELHORIA', 'PLANEJAMENTO']
 
-    referencia_atual = st.sidebar.selectbox('Mês de Referência', sorted(metricas_df['Referência'].unique(), reverse=True))
+def obter_valor(df, ref, coluna):
+    try:
+        return df.loc[df['Referência'] == ref, coluna].values[0]
+    except (IndexError, KeyError):
+        return 0
 
-    def obter_valor(df, ref, coluna):
-        try:
-            return df.loc[df['Referência'] == ref, coluna].values[0]
-        except (IndexError, KeyError):
-            return 0
+def calc_delta(atual, anterior):
+    return int(atual - anterior)
 
-    def calc_delta(atual, anterior):
-        return int(atual - anterior)
+def figura_dashboard(versao, equipe, nome, construir, **filtros):
+    # Cada figura é construída uma vez por snapshot, equipe e mês; ver `figura_em_cache`
+    return figura_em_cache(versao, 'dashboard', nome, construir, equipe=equipe, **filtros)
+
+@st.fragment
+def indicadores_do_mes(versao, equipe_opcao, metricas_df, natureza_df, tipo_df, usar_borda, cartoes, barra):
+    """
+    Seletor do mês de referência, cartões e gráfico por tipo de OS: só eles dependem do mês, então
+    a troca do mês reexecuta só este trecho. Os cartões e o gráfico vão para os espaços `cartoes`
+    e `barra` da página; os demais dados vêm da última execução completa (equipe, bordas).
+    """
+    referencia_atual = st.selectbox('Mês de Referência', sorted(metricas_df['Referência'].unique(), reverse=True))
 
     ano, mes = map(int, referencia_atual.split("-"))
     anterior = f"{ano - 1}-12" if mes == 1 else f"{ano}-{mes - 1:02d}"
     if anterior not in metricas_df['Referência'].values:
         anterior = referencia_atual
 
-    st.text('Indicadores de Execução')
-    colunas_exec = ['Backlogs', 'OS Abertas', 'OS Não Atendidas', 'OS Atendidas', 'Backlogs Atendidos']
-    cols = st.columns(len(colunas_exec))
-    for i, col in enumerate(colunas_exec):
-        atual = obter_valor(metricas_df, referencia_atual, col)
-        ant = obter_valor(metricas_df, anterior, col)
-        cols[i].metric(col, atual, calc_delta(atual, ant))
-    style_metric_cards(border_left_color='#FF8C00')
+    with cartoes.container():
+        st.text('Indicadores de Execução')
+        colunas_exec = ['Backlogs', 'OS Abertas', 'OS Não Atendidas', 'OS Atendidas', 'Backlogs Atendidos']
+        cols = st.columns(len(colunas_exec))
+        for i, col in enumerate(colunas_exec):
+            atual = obter_valor(metricas_df, referencia_atual, col)
+            ant = obter_valor(metricas_df, anterior, col)
+            cols[i].metric(col, atual, calc_delta(atual, ant))
+
+        st.text('Natureza de OS')
+        cols = st.columns(len(NATUREZA_COLS))
+        for i, col in enumerate(NATUREZA_COLS):
+            atual = obter_valor(natureza_df, referencia_atual, col)
+            ant = obter_valor(natureza_df, anterior, col)
+            cols[i].metric(col.title().replace('_', ' '), atual, calc_delta(atual, ant))
+
+    with barra.container():
+        exibir_com_borda(figura_dashboard(versao, equipe_opcao, 'tipo', lambda: grafico_barra_tipo(tipo_df, referencia_atual),
+                                          referencia=referencia_atual), usar_borda, key="grafico_tipo")
+
+def dashboard(versao):
+    st.markdown(titulo_page('Dashboard', ''), unsafe_allow_html=True)
+    # -----------------------------------------------
+    # Filtragem por Equipe (a troca da equipe ou das bordas reexecuta a página inteira)
+    equipes = equipes_cubo(carregar_cubo(versao))
+    equipe_opcao = st.sidebar.selectbox('Equipe', [TODAS_EQUIPES] + sorted(equipes, reverse=True))
 
-    st.text('Natureza de OS')
-    natureza_cols = ['ACOMPANHAMENTO', 'CORRETIVA EMERGENCIAL', 'CORRETIVA PLANEJADA', 'OBRA E MELHORIA', 'PLANEJAMENTO'] 
-    cols = st.columns(len(natureza_cols))
-    for i, col in enumerate(natureza_cols):
-        atual = obter_valor(natureza_df, referencia_atual, col)
-        ant = obter_valor(natureza_df, anterior, col)
-        cols[i].metric(col.title().replace('_', ' '), atual, calc_delta(atual, ant))
+    metricas_df, natureza_df, tipo_df = carregar_indicadores(versao, equipe_opcao)
+    for data in [metricas_df, natureza_df, tipo_df]:
+        data['Referência'] = data['Referência'].astype(str)
 
+    # Espaços da página preenchidos por `indicadores_do_mes`; o seletor do mês fica na barra
+    # lateral, antes da opção de bordas
+    cartoes = st.empty()
+    style_metric_cards(border_left_color='#FF8C00')
+    painel_mes = st.sidebar.container()
 
-    
     # Opção de Utilizar Borda nos Gráficos
     usar_borda = st.sidebar.checkbox("Exibir bordas nos gráficos", value=True)
     if not usar_borda:
         st.sidebar.markdown(':blue[**⛶ Gráficos em tela cheia**]', unsafe_allow_html=True)
     st.session_state['fullscreen'] = not usar_borda
-    print(df)
+    if usar_borda:
+        estilo_bordas()
+
     # Exibir Gráficos
+    def figura(nome, construir):
+        return figura_dashboard(versao, equipe_opcao, nome, construir)
+
     col1, col2 = st.columns(2)
     with col1:
-        exibir_com_borda(criar_grafico_linhas(metricas_df, ['OS Abertas', 'OS Atendidas', 'OS Não Atendidas', 'Backlogs'], 'OS Abertas vs Atendidas'), usar_borda)
-        exibir_com_borda(criar_grafico_linhas(natureza_df, natureza_cols, 'Histórico de Natureza das OS'), usar_borda)
+        exibir_com_borda(figura('os', lambda: criar_grafico_linhas(metricas_df, ['OS Abertas', 'OS Atendidas', 'OS Não Atendidas', 'Backlogs'], 'OS Abertas vs Atendidas')), usar_borda, key="grafico_os")
+        exibir_com_borda(figura('natureza', lambda: criar_grafico_linhas(natureza_df, NATUREZA_COLS, 'Histórico de Natureza das OS')), usar_borda, key="grafico_natureza")
     with col2:
-        exibir_com_borda(grafico_percentual(metricas_df), usar_borda)
-        exibir_com_borda(criar_grafico_linhas(metricas_df.sort_values('Referência'), ['TME (h)', 'TMA (h)', 'TMS (h)'], 'Tempos Médios (Execução, Atendimento, Solução) em Horas'), usar_borda)
+        exibir_com_borda(figura('percentual', lambda: grafico_percentual(metricas_df)), usar_borda, key="grafico_percentual")
+        exibir_com_borda(figura('tempos', lambda: criar_grafico_linhas(metricas_df.sort_values('Referência'), ['TME (h)', 'TMA (h)', 'TMS (h)'], 'Tempos Médios (Execução, Atendimento, Solução) em Horas')), usar_borda, key="grafico_tempos")
 
-    exibir_com_borda(grafico_barra_tipo(tipo_df, referencia_atual), usar_borda)
+    barra = st.empty()
+    with painel_mes:
+        indicadores_do_mes(versao, equipe_opcao, metricas_df, natureza_df, tipo_df, usar_borda, cartoes, barra)
 
 if __name__ == "__main__":
-    df = carregar_dados()
-    dashboard(df)
+    dashboard(versao_snapshot())
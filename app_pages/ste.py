@@ -11,23 +11,16 @@ from reportlab.lib.enums import TA_LEFT
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import os
 import plotly.express as px
+from utils.armazenamento import ler_base, versao_snapshot
+from utils.graph_tools import figura_em_cache
+from utils.tools import serie_minutos_para_hhhmm
 
 # ======== CONFIGURAÇÕES ========
-CAMINHO_CSV = './dados/DBTecno_All.csv'
+BASE_TECNICOS = 'DBTecno_All'
 HISTORICO_PATH = './historico_analises/'
 os.makedirs(HISTORICO_PATH, exist_ok=True)
 
 # ======== FUNÇÕES AUXILIARES ========
-def tempo_para_minutos(tempo):
-    horas, minutos = map(int, tempo.split(':'))
-    return horas * 60 + minutos
-
-def minutos_para_hhhmm(minutos):
-    if pd.isna(minutos): return "000:00"
-    h = int(minutos // 60)
-    m = int(minutos % 60)
-    return f"{h:03}:{m:02}"
-
 def obter_modelos_anteriores():
     arquivos = [f for f in os.listdir(HISTORICO_PATH) if f.endswith(".txt")]
     textos = []
@@ -92,11 +85,100 @@ def salvar_novo_modelo(analise):
         f.write(analise)
 
 
+# ======== AGREGAÇÕES ========
+# A versão do snapshot entra na chave do cache: uma ingestão publicada invalida os resumos em memória
+@st.cache_data
+def carregar_tecnicos(versao: str):
+    df = ler_base(BASE_TECNICOS, colunas=['TECNICO', 'EQUIPE', 'TIPO', 'Início', 'Tempo_min'])
+    df['MesAno'] = df['Início'].dt.to_period('M').astype(str)
+    return df
+
+def filtrar_tecnicos(versao, tecnico, equipe, tipo):
+    df_filtrado = carregar_tecnicos(versao)
+    if tecnico != 'Todos': df_filtrado = df_filtrado[df_filtrado['TECNICO'] == tecnico]
+    if equipe != 'Todas': df_filtrado = df_filtrado[df_filtrado['EQUIPE'] == equipe]
+    if tipo != 'Todos': df_filtrado = df_filtrado[df_filtrado['TIPO'] == tipo]
+    return df_filtrado
+
+# Resumos calculados uma vez por snapshot e seleção de filtros
+@st.cache_data
+def resumos_tecnicos(versao: str, tecnico: str, equipe: str, tipo: str):
+    """Resumo mensal, resumo por técnico e volume dos 10 técnicos com mais ordens."""
+    df_filtrado = filtrar_tecnicos(versao, tecnico, equipe, tipo)
+
+    # Resumo Mensal
+    checklists = df_filtrado[df_filtrado['TIPO'] == 'Checklist']
+    os_corretivas = df_filtrado[df_filtrado['TIPO'] == 'OS Corretiva']
+    # Agregações para Checklist
+    resumo_checklist = checklists.groupby('MesAno')['Tempo_min'].agg(
+        Checklists='count',
+        Tempo_Total_Checklist_min='sum',
+        Tempo_Medio_Checklist_min='mean'
+    )
+    # Agregações para OS Corretiva
+    resumo_os = os_corretivas.groupby('MesAno')['Tempo_min'].agg(
+        OS_Corretivas='count',
+        Tempo_Total_OS_Corretiva_min='sum',
+        Tempo_Medio_OS_Corretiva_min='mean'
+    )
+    # Mesclando os dois resumos
+    resumo_mensal = pd.concat([resumo_checklist, resumo_os], axis=1).fillna(0).reset_index()
+    # Convertendo os tempos para formato hhh:mm
+    resumo_mensal['Checklist TT'] = serie_minutos_para_hhhmm(resumo_mensal['Tempo_Total_Checklist_min'])
+    resumo_mensal['OS Corretiva TT'] = serie_minutos_para_hhhmm(resumo_mensal['Tempo_Total_OS_Corretiva_min'])
+    resumo_mensal['Checklist TM'] = serie_minutos_para_hhhmm(resumo_mensal['Tempo_Medio_Checklist_min'])
+    resumo_mensal['OS Corretiva TM'] = serie_minutos_para_hhhmm(resumo_mensal['Tempo_Medio_OS_Corretiva_min'])
+    resumo_mensal['OS Corretivas'] = resumo_mensal['OS_Corretivas']
+    resumo_mensal = resumo_mensal[[
+        'MesAno', 'Checklists', 'Checklist TT', 'Checklist TM',
+        'OS Corretivas', 'OS Corretiva TT', 'OS Corretiva TM'
+    ]]
+
+    # Resumo Técnico por Mês, Técnico e Equipe
+    # Contagem por tipo como soma de indicadores (também com a seleção vazia, em que o TIPO é categórico)
+    resumo_tecnico = df_filtrado.assign(
+        Checklist=df_filtrado['TIPO'] == 'Checklist',
+        Corretiva=df_filtrado['TIPO'] == 'OS Corretiva',
+    ).groupby(['MesAno', 'TECNICO', 'EQUIPE'], observed=True).agg(
+        Total_Checklists=('Checklist', 'sum'),
+        Total_OS_Corretivas=('Corretiva', 'sum'),
+        Tempo_Total_min=('Tempo_min', 'sum'),
+        Tempo_Medio_min=('Tempo_min', 'mean')
+    ).reset_index()
+    # Converte tempo total e médio para hhh:mm
+    resumo_tecnico['Tempo_Total'] = serie_minutos_para_hhhmm(resumo_tecnico['Tempo_Total_min'])
+    resumo_tecnico['Tempo_Medio'] = serie_minutos_para_hhhmm(resumo_tecnico['Tempo_Medio_min'])
+    resumo_tecnico = resumo_tecnico[[
+        'MesAno', 'TECNICO', 'EQUIPE', 'Total_Checklists', 'Total_OS_Corretivas',
+        'Tempo_Total', 'Tempo_Medio'
+    ]]
+
+    # Ordena por total de ordens e pega os top 10
+    top_tecnicos = resumo_tecnico.assign(
+        Total_Ordens=resumo_tecnico['Total_Checklists'] + resumo_tecnico['Total_OS_Corretivas']
+    ).sort_values(by='Total_Ordens', ascending=False).head(10)
+    # Reformata para gráfico de barras com total de ordens por tipo
+    volume_top10 = top_tecnicos.melt(
+        id_vars=['TECNICO'],
+        value_vars=['Total_Checklists', 'Total_OS_Corretivas'],
+        var_name='Tipo',
+        value_name='Quantidade'
+    )
+    return resumo_mensal, resumo_tecnico, volume_top10
+
+@st.cache_data
+def volume_por_equipe(versao: str, tecnico: str, equipe: str, tipo: str, mes: str):
+    """Checklists e OS Corretivas por equipe, no mês selecionado (ou em todos)."""
+    df_filtrado = filtrar_tecnicos(versao, tecnico, equipe, tipo)
+    if mes != 'Todos': df_filtrado = df_filtrado[df_filtrado['MesAno'] == mes]
+    df_agrupado = df_filtrado.groupby(['EQUIPE', 'TIPO'], observed=True).size().reset_index(name='Quantidade')
+    # Filtra apenas Checklist e OS Corretiva (caso haja outros tipos)
+    return df_agrupado[df_agrupado['TIPO'].isin(['Checklist', 'OS Corretiva'])]
+
+
 # ======== APLICAÇÃO PRINCIPAL STREAMLIT ========
-df = pd.read_csv(CAMINHO_CSV)
-df['Início'] = pd.to_datetime(df['Início'])
-df['MesAno'] = df['Início'].dt.to_period('M').astype(str)
-df['Tempo_min'] = df['Tempo'].apply(tempo_para_minutos)
+versao = versao_snapshot()
+df = carregar_tecnicos(versao)
 
 st.title("Análise de Ordens de Serviço - Equipes de Manutenção")
 
@@ -113,64 +195,9 @@ equipe_sel = st.sidebar.selectbox("Equipe:", equipes)
 tipo_sel = st.sidebar.selectbox("Tipo:", tipos)
 mes_sel = st.sidebar.selectbox("Mês/Ano:", meses)
 
-# Aplicar filtros
-df_filtrado = df.copy()
-if tecnico_sel != 'Todos': df_filtrado = df_filtrado[df_filtrado['TECNICO'] == tecnico_sel]
-if equipe_sel != 'Todas': df_filtrado = df_filtrado[df_filtrado['EQUIPE'] == equipe_sel]
-if tipo_sel != 'Todos': df_filtrado = df_filtrado[df_filtrado['TIPO'] == tipo_sel]
-
-
-# Resumo Mensal
-
-checklists = df_filtrado[df_filtrado['TIPO'] == 'Checklist']
-os_corretivas = df_filtrado[df_filtrado['TIPO'] == 'OS Corretiva']
-# Agregações para Checklist
-resumo_checklist = checklists.groupby('MesAno')['Tempo_min'].agg(
-    Checklists='count',
-    Tempo_Total_Checklist_min='sum',
-    Tempo_Medio_Checklist_min='mean'
-)
-# Agregações para OS Corretiva
-resumo_os = os_corretivas.groupby('MesAno')['Tempo_min'].agg(
-    OS_Corretivas='count',
-    Tempo_Total_OS_Corretiva_min='sum',
-    Tempo_Medio_OS_Corretiva_min='mean'
-)
-# Mesclando os dois resumos
-resumo_mensal = pd.concat([resumo_checklist, resumo_os], axis=1).fillna(0).reset_index()
-# Convertendo os tempos para formato hhh:mm
-resumo_mensal['Checklist TT'] = resumo_mensal['Tempo_Total_Checklist_min'].apply(minutos_para_hhhmm)
-resumo_mensal['OS Corretiva TT'] = resumo_mensal['Tempo_Total_OS_Corretiva_min'].apply(minutos_para_hhhmm)
-resumo_mensal['Checklist TM'] = resumo_mensal['Tempo_Medio_Checklist_min'].apply(minutos_para_hhhmm)
-resumo_mensal['OS Corretiva TM'] = resumo_mensal['Tempo_Medio_OS_Corretiva_min'].apply(minutos_para_hhhmm)
-resumo_mensal['OS Corretivas'] = resumo_mensal['OS_Corretivas']
-    # Removendo colunas em minutos (valores não formatados)
-resumo_mensal = resumo_mensal.drop(columns=[
-    'Tempo_Total_Checklist_min',
-    'Tempo_Medio_Checklist_min',
-    'Tempo_Total_OS_Corretiva_min',
-    'Tempo_Medio_OS_Corretiva_min',
-    'OS_Corretivas'
-    ])
-resumo_mensal = resumo_mensal[[
-    'MesAno', 'Checklists', 'Checklist TT', 'Checklist TM', 
-    'OS Corretivas', 'OS Corretiva TT', 'OS Corretiva TM'
-]]
-# Resumo Técnico por Mês, Técnico e Equipe
-resumo_tecnico = df_filtrado.groupby(['MesAno', 'TECNICO', 'EQUIPE']).agg(
-    Total_Checklists=('TIPO', lambda x: (x == 'Checklist').sum()),
-    Total_OS_Corretivas=('TIPO', lambda x: (x == 'OS Corretiva').sum()),
-    Tempo_Total_min=('Tempo_min', 'sum'),
-    Tempo_Medio_min=('Tempo_min', 'mean')
-).reset_index()
-
-# Converte tempo total e médio para hhh:mm
-resumo_tecnico['Tempo_Total'] = resumo_tecnico['Tempo_Total_min'].apply(minutos_para_hhhmm)
-resumo_tecnico['Tempo_Medio'] = resumo_tecnico['Tempo_Medio_min'].apply(minutos_para_hhhmm)
-resumo_tecnico = resumo_tecnico[[
-    'MesAno', 'TECNICO', 'EQUIPE', 'Total_Checklists', 'Total_OS_Corretivas',
-    'Tempo_Total', 'Tempo_Medio'
-]]
+# Resumos e figuras calculados uma vez por snapshot e seleção de filtros (ver `figura_em_cache`)
+filtros = dict(tecnico=tecnico_sel, equipe=equipe_sel, tipo=tipo_sel)
+resumo_mensal, resumo_tecnico, df_volume_top10 = resumos_tecnicos(versao, **filtros)
 
 
 # 1.1 Dados Mensais
@@ -181,34 +208,35 @@ exibir_aggrid(resumo_mensal, use_container_width=True, hide_index=True)
 # 2.1 Evolução Mensal
 titulo = "2.1 Evolução Mensal - Volume de Ordens por Mês"
 st.subheader(titulo)
-resumo_mensal['MesAnoFormatado'] = pd.to_datetime(resumo_mensal['MesAno']).dt.strftime('%m/%Y')
-fig_plotly = px.line(resumo_mensal, x='MesAnoFormatado', y=['Checklists', 'OS Corretivas'], markers=True, title=titulo)
-fig_plotly.update_traces(mode="lines+markers")
-fig_plotly.update_layout(xaxis_title="Mês/Ano")
-st.plotly_chart(fig_plotly, use_container_width=True)
+def grafico_evolucao():
+    evolucao = resumo_mensal.assign(MesAnoFormatado=pd.to_datetime(resumo_mensal['MesAno']).dt.strftime('%m/%Y'))
+    fig_plotly = px.line(evolucao, x='MesAnoFormatado', y=['Checklists', 'OS Corretivas'], markers=True, title=titulo)
+    fig_plotly.update_traces(mode="lines+markers")
+    fig_plotly.update_layout(xaxis_title="Mês/Ano")
+    return fig_plotly
+st.plotly_chart(figura_em_cache(versao, 'ste', 'evolucao', grafico_evolucao, **filtros), use_container_width=True)
 
 # Agrupa por equipe e tipo, e conta quantos registros existem
-if mes_sel != 'Todos': df_filtrado = df_filtrado[df_filtrado['MesAno'] == mes_sel]
-df_agrupado = df_filtrado.groupby(['EQUIPE', 'TIPO']).size().reset_index(name='Quantidade')
-
-# Filtra apenas Checklist e OS Corretiva (caso haja outros tipos)
-df_agrupado = df_agrupado[df_agrupado['TIPO'].isin(['Checklist', 'OS Corretiva'])]
+df_agrupado = volume_por_equipe(versao, mes=mes_sel, **filtros)
 
 # Cria o gráfico de barras agrupadas
 titulo = "3.1 Histórico por Equipe - Comparativo de Checklists e OS Corretivas"
 st.subheader(titulo)
 
-fig_barras = px.bar(
-    df_agrupado,
-    x='EQUIPE',
-    y='Quantidade',
-    color='TIPO',
-    barmode='group',  # Pode trocar por 'stack' se quiser empilhado
-    title=titulo,
-    text='Quantidade'
-)
-fig_barras.update_layout(xaxis_title="Equipe", yaxis_title="Quantidade")
-st.plotly_chart(fig_barras, use_container_width=True)
+def grafico_equipes():
+    fig_barras = px.bar(
+        df_agrupado,
+        x='EQUIPE',
+        y='Quantidade',
+        color='TIPO',
+        barmode='group',  # Pode trocar por 'stack' se quiser empilhado
+        title=titulo,
+        text='Quantidade'
+    )
+    fig_barras.update_layout(xaxis_title="Equipe", yaxis_title="Quantidade")
+    return fig_barras
+st.plotly_chart(figura_em_cache(versao, 'ste', 'equipes', grafico_equipes, mes=mes_sel, **filtros),
+                use_container_width=True)
 
 
 # 3.1 Resumo Técnico
@@ -216,43 +244,21 @@ titulo = "4.1 Resumo por Técnico"
 st.subheader(titulo)
 exibir_aggrid(resumo_tecnico)
 
-# Derrete (melt) para formato longo
-df_volume_tecnico = resumo_tecnico.melt(
-    id_vars=['TECNICO'],
-    value_vars=['Total_Checklists', 'Total_OS_Corretivas'],
-    var_name='Tipo',
-    value_name='Quantidade'
-)
-
-# Cria coluna com total de ordens
-resumo_tecnico['Total_Ordens'] = (
-    resumo_tecnico['Total_Checklists'] + resumo_tecnico['Total_OS_Corretivas']
-)
-
-# Ordena por total de ordens e pega os top 10
-top_tecnicos = resumo_tecnico.sort_values(by='Total_Ordens', ascending=False).head(10)
-print(top_tecnicos)
-# Reformata para gráfico de barras com total de ordens por tipo
-df_volume_top10 = top_tecnicos.melt(
-    id_vars=['TECNICO'],
-    value_vars=['Total_Checklists', 'Total_OS_Corretivas'],
-    var_name='Tipo',
-    value_name='Quantidade'
-)
-
 # Gráfico de barras horizontais - TOP 10 técnicos
 st.subheader("4.1 Volume de Ordens - Top 10 Técnicos")
-fig1 = px.bar(
-    df_volume_top10,
-    y='TECNICO',
-    x='Quantidade',
-    color='Tipo',
-    barmode='stack',
-    title="Top 10 Técnicos com Mais Ordens (Checklists + OS Corretivas)",
-    orientation='h'
-)
-fig1.update_layout(yaxis_title="Técnico", xaxis_title="Quantidade Total de Ordens")
-st.plotly_chart(fig1, use_container_width=True)
+def grafico_top_tecnicos():
+    fig1 = px.bar(
+        df_volume_top10,
+        y='TECNICO',
+        x='Quantidade',
+        color='Tipo',
+        barmode='stack',
+        title="Top 10 Técnicos com Mais Ordens (Checklists + OS Corretivas)",
+        orientation='h'
+    )
+    fig1.update_layout(yaxis_title="Técnico", xaxis_title="Quantidade Total de Ordens")
+    return fig1
+st.plotly_chart(figura_em_cache(versao, 'ste', 'top_tecnicos', grafico_top_tecnicos, **filtros), use_container_width=True)
 
 # Botão de geração
 titulo = "Análise Técnica Gerada"
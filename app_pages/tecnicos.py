@@ -4,6 +4,7 @@ from streamlit_tags import st_tags
 import pandas as pd
 from components import titulo_page
 from st_aggrid import AgGrid, GridOptionsBuilder
+from utils.armazenamento import ler_base
 from utils.tools import aggrid_ptbr, remover_acentos
 
 PORTUGUESE_TEXTS = aggrid_ptbr()
@@ -28,10 +29,10 @@ def aplicar_filtros_textuais(df, palavras):
 
     return df[mascara]
 
-def carregar_dados(caminho_csv):
+def carregar_dados(colunas=None):
     try:
-        df = pd.read_csv(caminho_csv, encoding='utf-8')
-        return df
+        df = ler_base('DBTecno_All', colunas=colunas)
+        return df if df is not None else pd.DataFrame()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
@@ -42,7 +43,7 @@ def carregar_dados(caminho_csv):
 
 def tecnicos():
     st.markdown(titulo_page('Equipe Técnica', 'Produtividade Mês Atual'), unsafe_allow_html=True)
-    df = carregar_dados('dados/DBTecno_All.csv')
+    df = carregar_dados(['Referência', 'TECNICO', 'EQUIPE', 'TIPO', 'Nº OS', 'Início', 'Término', 'Tempo'])
     if df.empty:
         return
 
@@ -0,0 +1,84 @@
+"""
+atualizar_bases.py
+
+Atualiza as bases pelo terminal, sem abrir o app (para cron ou timers do systemd):
+
+    python atualizar_bases.py
+    python atualizar_bases.py --completo --forcar --sem-cache --json
+    python atualizar_bases.py --lote 50000    # exportações grandes, com memória limitada
+
+Ao final, mostra o tempo, as linhas e o pico de memória de cada etapa.
+Sai com código 1 se as exportações do Optimus não puderem ser lidas.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def _progresso(percentual: int, texto: str):
+    print(f"[{percentual:3d}%] {texto}", file=sys.stderr, flush=True)
+
+def _formatar(valor, formato: str) -> str:
+    return '-' if valor is None else format(valor, formato)
+
+def _imprimir_resumo(resumo: dict):
+    print(f"Modo: {resumo['modo']} | OS atualizadas: {resumo['os_atualizadas']} | "
+          f"Atendimentos atualizados: {resumo['atendimentos_atualizados']} | "
+          f"Snapshot: {resumo.get('snapshot', '-')}")
+    # Uma etapa de leitura por arquivo: a coluna acompanha o nome mais longo
+    largura = max([24] + [len(etapa['etapa']) + 2 for etapa in resumo['etapas']])
+    if resumo['etapas']:
+        print()
+        print(f"{'Etapa':<{largura}}{'Tempo (s)':>10}{'Linhas':>10}{'Pico (MB)':>11}")
+        for etapa in resumo['etapas']:
+            tempo = 'cache' if etapa['cache'] else _formatar(etapa['segundos'], '.2f')
+            print(f"{etapa['etapa']:<{largura}}{tempo:>10}{_formatar(etapa['linhas'], 'd'):>10}"
+                  f"{_formatar(etapa['pico_memoria_mb'], '.1f'):>11}")
+    print(f"{'Total':<{largura}}{resumo['segundos']:>10.2f}")
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Atualiza as bases DBCorretivas e DBTecno_All a partir das exportações do Optimus em 'dados/'.")
+    parser.add_argument('--completo', action='store_true',
+                        help="reprocessa todas as OS, em vez de só as novas ou alteradas")
+    parser.add_argument('--forcar', action='store_true',
+                        help="processa mesmo que as exportações não tenham mudado")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="não reaproveita etapas já calculadas")
+    parser.add_argument('--sequencial', action='store_true',
+                        help="executa as etapas em sequência, sem o pool de processos")
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="não mede o pico de memória (o tracemalloc deixa a leitura das planilhas mais lenta)")
+    parser.add_argument('--lote', type=int, metavar='LINHAS',
+                        help="reprocessa tudo lendo as exportações em lotes de LINHAS linhas, com memória limitada")
+    parser.add_argument('--json', action='store_true',
+                        help="emite o resumo em JSON na saída padrão")
+    args = parser.parse_args(argv)
+    if args.lote is not None and args.lote < 1:
+        parser.error("--lote precisa ser um número positivo de linhas")
+
+    # Os caminhos do app ('dados/', 'utils/') são relativos à raiz do projeto
+    os.chdir(Path(__file__).resolve().parent)
+    from utils.ingestao import processar_bases
+
+    inicio = time.perf_counter()
+    resumo = processar_bases(incremental=not args.completo, progresso=_progresso,
+                             paralelo=not args.sequencial, cache=not args.sem_cache,
+                             forcar=args.forcar, medir=True, memoria=not args.sem_memoria, lote=args.lote)
+    if resumo is None:
+        print("Não foi possível ler as exportações do Optimus. Verifique os arquivos em 'dados/'.", file=sys.stderr)
+        return 1
+    resumo['segundos'] = time.perf_counter() - inicio
+
+    if args.json:
+        print(json.dumps(resumo, ensure_ascii=False, indent=2, default=str))
+    else:
+        _imprimir_resumo(resumo)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
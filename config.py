@@ -14,6 +14,10 @@ LOGO_LIGHT = "imgs/casapark-light.png"
 LOGO_DARK = "imgs/casapark-dark.png"
 LOGO_ICON = "imgs/icon-casa.png"
 
+# Tema do app: "light" ou "dark" fixa o tema (e o logotipo) sem detectar o do navegador;
+# None detecta. O parâmetro `?tema=` na URL tem precedência
+TEMA = None
+
 # Estilo visual padrão
 DEFAULT_BORDER_ENABLED = True
 BORDER_RADIUS = 10
@@ -24,4 +28,17 @@ BORDER_COLOR = "#1f77b4"
 DEFAULT_EXCEL_PATH = "dados/relatorio_os.xlsx"
 
 # Referência utilizada no dashboard
-REFERENCIA_ATUAL = "2025-04"
\ No newline at end of file
+REFERENCIA_ATUAL = "2025-04"
+
+# Figuras dos gráficos em memória, compartilhadas entre as sessões (chave = snapshot + página + filtros)
+FIGURAS_CACHE_MAX = 256
+
+# Cache em disco das etapas de ingestão (chave = hash do conteúdo das entradas + versão do código)
+CACHE_INGESTAO_DIR = "dados/.cache"
+CACHE_INGESTAO_MAX_MB = 512
+
+# Monitoramento da pasta de entrada das exportações do Optimus (monitorar_exportacoes.py)
+PASTA_ENTRADA = "dados/entrada"
+MONITOR_INTERVALO_S = 30       # intervalo entre as verificações da pasta
+MONITOR_ESTABILIDADE_S = 60    # tempo sem mudança de tamanho/data para considerar a cópia concluída
+HORARIOS_PICO = []             # faixas sem ingestão automática, ex.: [("08:00", "10:00"), ("13:00", "15:00")]
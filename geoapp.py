@@ -1,31 +1,9 @@
 import streamlit as st
 import time
 from components import configurar_pagina, header_page
-from streamlit_javascript import st_javascript
 from utils.tools_ui import aplicar_estilos
 from config import APP_TITLE, APP_ICON, SIDEBAR_INIT, LOGO_DARK, LOGO_LIGHT, LOGO_ICON
 
-#def detectar_tema():
-#    # Injeta um div oculto com a cor de fundo do tema atual
-#    st.markdown("""
-#        <div id="theme-detector" style="background-color: var(--background-color); display:none;"></div>
-#    """, unsafe_allow_html=True)
-#
-#    # JavaScript pega a cor computada do background
-#    cor_fundo = st_javascript("""
-#        const elem = window.parent.document.getElementById("theme-detector");
-#        const color = window.getComputedStyle(elem).backgroundColor;
-#        color;
-#    """)
-#    # Analisa se é tema escuro baseado na cor RGB
-#    if cor_fundo and isinstance(cor_fundo, str):
-#        if "rgb(0, 0, 0" in cor_fundo or "rgb(1, 1, 1" in cor_fundo:  # preto ou quase preto
-#            return "dark"
-#        else:
-#            return "light"
-#    return "light"  # fallback
-
-
 def carregar_paginas():
     """Define a estrutura de navegação entre as páginas da aplicação."""
     paginas = {
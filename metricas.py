@@ -1,4 +1,18 @@
+"""
+metricas.py
+
+Definição de referência dos indicadores mensais do dashboard, calculados direto da DBCorretivas:
+- `metricascorretivas`
+- `hist_natureza`
+- `hist_tipo`
+
+O dashboard lê os mesmos indicadores do cubo (`utils.indicadores.indicadores_da_equipe`); os testes
+comparam os dois, equipe por equipe.
+"""
+
+import numpy as np
 import pandas as pd
+from utils.tools import arredondar_horas
 
 
 def hist_natureza(df):
@@ -13,7 +27,7 @@ def hist_natureza(df):
     #meses = df["Referência"].dropna().unique()
 
     # Novo DataFrame por Natureza de OS
-    df_natureza = df.groupby(["Referência", "NATUREZA"]).size().unstack(fill_value=0).reset_index()
+    df_natureza = df.groupby(["Referência", "NATUREZA"], observed=True).size().unstack(fill_value=0).reset_index()
     df_natureza.index.name = None  # remove o nome do índice    
     return df_natureza
 
@@ -30,60 +44,78 @@ def hist_tipo(df):
     #meses = df["Referência"].dropna().unique()
 
     # Novo DataFrame por Tipo de OS
-    df_tipo = df.groupby(["Referência", "TIPO DE OS"]).size().unstack(fill_value=0).reset_index()
+    df_tipo = df.groupby(["Referência", "TIPO DE OS"], observed=True).size().unstack(fill_value=0).reset_index()
     df_tipo.index.name = None  # remove o nome do índice 
     return df_tipo
 
 
 def metricascorretivas(df):
-    df = df.copy()
-    # Conversão de datas
-    df["Data/Hora Abertura"] = pd.to_datetime(df["Data/Hora Abertura"], errors='coerce')
-    df["Data/Hora Início"] = pd.to_datetime(df["Data/Hora Início"], errors='coerce')
-    df["Data/Hora Término"] = pd.to_datetime(df["Data/Hora Término"], errors='coerce')
+    """
+    Indicadores mensais das corretivas, pelo mês de abertura das OS.
+    Os tempos médios (TME, TMA e TMS) são médias das colunas em minutos inteiros da base
+    (`Execução_min`, `Atendimento_min` e `Solução_min`, com os segundos truncados), e não das
+    durações exatas entre as datas, como antes delas. Em bases com horários com segundos, cada OS
+    perde menos de um minuto, e a média arredondada pode ficar até 0,02 h abaixo da calculada
+    pelas datas.
+    """
+    # Indicadores por mês, na ordem em que os meses aparecem na base, numa passada só:
+    # contagens com `bincount` e backlog por busca binária nas aberturas ordenadas
 
-    # Criar coluna com mês referência
-    df["Mês Referência"] = df["Data/Hora Abertura"].dt.to_period("M").dt.strftime("%Y/%m").sort_values()
-    meses = df["Mês Referência"].dropna().unique()
-
-    resultados = []
-
-    for mes in meses:
-        inicio = pd.Timestamp(mes + "-01")
-        fim = inicio + pd.offsets.MonthEnd(0)
-        df_mes = df[df["Mês Referência"] == mes]
-
-        os_abertas = len(df_mes)
-        os_atendidas = df_mes["Data/Hora Término"].notna().sum()
-        os_nao_atendidas = os_abertas - os_atendidas
-
-        backlog = df[(df["Data/Hora Abertura"] < inicio) & (df["Data/Hora Término"].isna())].shape[0]
-        backlog_atendidos = df[(df["Data/Hora Abertura"] < inicio) &
-                               (df["Data/Hora Término"] >= inicio) &
-                               (df["Data/Hora Término"] <= fim)].shape[0]
-
-        df_exec = df_mes[df_mes["Data/Hora Início"].notna() & df_mes["Data/Hora Término"].notna()].copy()
-        df_exec["TME (h)"] = (df_exec["Data/Hora Término"] - df_exec["Data/Hora Início"]).dt.total_seconds() / 3600
-        df_exec["TMA (h)"] = (df_exec["Data/Hora Início"] - df_exec["Data/Hora Abertura"]).dt.total_seconds() / 3600
-        df_exec["TMS (h)"] = (df_exec["Data/Hora Término"] - df_exec["Data/Hora Abertura"]).dt.total_seconds() / 3600
-
-        tme = df_exec["TME (h)"].mean()
-        tma = df_exec["TMA (h)"].mean()
-        tms = df_exec["TMS (h)"].mean()
-
-        resultados.append({
-            "Referência": inicio.strftime("%Y-%m"),
-            "Backlogs": backlog,
-            "OS Abertas": os_abertas,
-            "OS Não Atendidas": os_nao_atendidas,
-            "OS Atendidas": os_atendidas,
-            "Backlogs Atendidos": backlog_atendidos,
-            "TME (h)": round(tme, 2),
-            "TMA (h)": round(tma, 2),
-            "TMS (h)": round(tms, 2)
-        })
-
-    df_resultados = pd.DataFrame(resultados)
+    # Conversão de datas
+    abertura = pd.to_datetime(df["Data/Hora Abertura"], errors='coerce')
+    inicio_os = pd.to_datetime(df["Data/Hora Início"], errors='coerce')
+    termino = pd.to_datetime(df["Data/Hora Término"], errors='coerce')
+
+    # Mês de referência de cada OS (-1 sem data de abertura)
+    codigos, meses = pd.factorize(abertura.dt.to_period("M"))
+    n_meses = len(meses)
+    inicios = meses.to_timestamp()
+    fins = inicios + pd.offsets.MonthEnd(0)
+    no_mes = codigos >= 0
+    atendida = termino.notna().to_numpy()
+
+    os_abertas = np.bincount(codigos[no_mes], minlength=n_meses)
+    os_atendidas = np.bincount(codigos[no_mes & atendida], minlength=n_meses)
+
+    # Backlog: abertas antes do início do mês e ainda sem término
+    pendentes = np.sort(abertura[~atendida & abertura.notna().to_numpy()].to_numpy())
+    backlog = np.searchsorted(pendentes, inicios.to_numpy(), side='left')
+
+    # Backlogs atendidos: o término cai em no máximo um dos meses; conta se a OS foi aberta antes dele
+    mes_termino = meses.get_indexer(termino.dt.to_period("M"))
+    com_mes = mes_termino >= 0
+    posicao = mes_termino[com_mes]
+    conta = ((abertura.to_numpy()[com_mes] < inicios.to_numpy()[posicao]) &
+             (termino.to_numpy()[com_mes] <= fins.to_numpy()[posicao]))
+    backlog_atendidos = np.bincount(posicao[conta], minlength=n_meses)
+
+    # Tempos médios em horas, a partir das colunas em minutos gravadas na base. Cada mês é uma
+    # fatia contígua (na ordem original) e é somado como no `mean` do pandas, com os vazios zerados
+    executada = no_mes & atendida & inicio_os.notna().to_numpy()
+    ordem = np.argsort(codigos[executada], kind='stable')
+    codigos_exec = codigos[executada][ordem]
+    limites = np.searchsorted(codigos_exec, np.arange(n_meses + 1))
+    medias = {}
+    for coluna in ("Execução_min", "Atendimento_min", "Solução_min"):
+        valores = df[coluna].to_numpy(dtype='float64')[executada][ordem]
+        validos = ~np.isnan(valores)
+        valores = np.where(validos, valores, 0.0)
+        somas = np.array([valores[a:b].sum() for a, b in zip(limites[:-1], limites[1:])], dtype='float64')
+        quantidades = np.bincount(codigos_exec[validos], minlength=n_meses)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias[coluna] = np.where(quantidades > 0, somas / quantidades, np.nan) / 60
+
+    df_resultados = pd.DataFrame({
+        "Referência": meses.strftime("%Y-%m"),
+        "Backlogs": backlog,
+        "OS Abertas": os_abertas,
+        "OS Não Atendidas": os_abertas - os_atendidas,
+        "OS Atendidas": os_atendidas,
+        "Backlogs Atendidos": backlog_atendidos,
+        "TME (h)": arredondar_horas(medias["Execução_min"]),
+        "TMA (h)": arredondar_horas(medias["Atendimento_min"]),
+        "TMS (h)": arredondar_horas(medias["Solução_min"])
+    })
     df_resultados["% Atendimento"] = ((df_resultados["OS Atendidas"] / df_resultados["OS Abertas"]) * 100).round(1)
 
-    return df_resultados
\ No newline at end of file
+    return df_resultados
@@ -0,0 +1,155 @@
+"""
+monitorar_exportacoes.py
+
+Monitora a pasta de entrada (`PASTA_ENTRADA`) e atualiza as bases sozinho quando chegam
+exportações novas do Optimus:
+
+    python monitorar_exportacoes.py             # serviço: verifica a pasta a cada MONITOR_INTERVALO_S
+    python monitorar_exportacoes.py --uma-vez   # uma verificação só (para cron)
+
+Cada base pode vir em vários arquivos (ex.: um por mês, `historico_oss_corretivas_2025-01.xls`),
+consolidados na ingestão. Uma exportação só é usada depois de ficar MONITOR_ESTABILIDADE_S sem
+mudar de tamanho nem de data, para não ler um arquivo ainda sendo copiado. Fora dos HORARIOS_PICO,
+os arquivos prontos são instalados em `dados/` e a ingestão incremental é executada; o snapshot
+publicado ao final invalida os caches de dados do app. Se a ingestão falhar, as exportações
+anteriores são restauradas.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger('monitor')
+
+
+def em_horario_de_pico(agora: datetime, faixas: list) -> bool:
+    """Indica se `agora` cai em alguma das faixas ("HH:MM", "HH:MM") de pico."""
+    hora = agora.strftime('%H:%M')
+    return any(inicio <= hora < fim for inicio, fim in faixas)
+
+def _assinatura(caminho: Path):
+    try:
+        info = caminho.stat()
+    except FileNotFoundError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+def arquivos_prontos(entrada: Path, vistos: dict, estabilidade: float) -> list:
+    """
+    Exportações da pasta de entrada estáveis há `estabilidade` segundos e diferentes das de `dados/`.
+    `vistos` guarda, entre as chamadas, a última assinatura (tamanho, data) de cada arquivo e desde quando.
+    """
+    from utils.cache import hash_arquivo
+    from utils.ingestao import CORE_XLS, TECNO_XLS, arquivos_exportacao
+
+    agora = time.monotonic()
+    prontos = []
+    nomes = arquivos_exportacao(CORE_XLS, entrada) + arquivos_exportacao(TECNO_XLS, entrada)
+    for nome in set(vistos) - set(nomes):
+        vistos.pop(nome)
+    for nome in nomes:
+        assinatura = _assinatura(entrada / nome)
+        if assinatura is None:
+            vistos.pop(nome, None)
+            continue
+        anterior = vistos.get(nome)
+        if anterior is None or anterior[0] != assinatura:
+            vistos[nome] = (assinatura, agora)
+            continue
+        if agora - anterior[1] < estabilidade:
+            continue
+        instalado = Path('dados') / nome
+        if not instalado.exists() or hash_arquivo(entrada / nome) != hash_arquivo(instalado):
+            prontos.append(nome)
+    return prontos
+
+def instalar_e_processar(entrada: Path, nomes: list) -> bool:
+    """Copia as exportações para `dados/` (troca atômica) e roda a ingestão; restaura as anteriores se falhar."""
+    from utils.ingestao import processar_bases
+
+    anteriores = {}
+    for nome in nomes:
+        destino = Path('dados') / nome
+        temporario = destino.with_name(f'.{nome}.tmp')
+        shutil.copy2(entrada / nome, temporario)
+        if destino.exists():
+            anteriores[nome] = destino.with_name(f'.{nome}.anterior')
+            os.replace(destino, anteriores[nome])
+        os.replace(temporario, destino)
+
+    try:
+        resumo = processar_bases(incremental=True, progresso=lambda pct, texto: log.debug("%3d%% %s", pct, texto))
+    except Exception:
+        log.exception("Falha na ingestão")
+        resumo = None
+
+    if resumo is None:
+        for nome, anterior in anteriores.items():
+            os.replace(anterior, Path('dados') / nome)
+        log.error("Ingestão não concluída; exportações anteriores restauradas: %s", ', '.join(nomes))
+        return False
+
+    for anterior in anteriores.values():
+        anterior.unlink(missing_ok=True)
+    log.info("Bases atualizadas (modo %s, %s OS reprocessadas, snapshot %s)",
+             resumo['modo'], resumo['os_atualizadas'], resumo.get('snapshot', '-'))
+    return True
+
+def verificar(entrada: Path, vistos: dict, estabilidade: float, pico: list) -> bool:
+    """Uma verificação da pasta; retorna True se as bases foram atualizadas."""
+    prontos = arquivos_prontos(entrada, vistos, estabilidade)
+    if not prontos:
+        return False
+    if em_horario_de_pico(datetime.now(), pico):
+        log.info("Exportações prontas (%s), adiadas para depois do horário de pico", ', '.join(prontos))
+        return False
+    log.info("Processando exportações novas: %s", ', '.join(prontos))
+    if instalar_e_processar(entrada, prontos):
+        return True
+    # Não tenta de novo a mesma exportação com defeito: espera o arquivo mudar
+    for nome in prontos:
+        vistos[nome] = (vistos[nome][0], float('inf'))
+    return False
+
+def main(argv: list = None) -> int:
+    # Os caminhos do app ('dados/', 'utils/') são relativos à raiz do projeto
+    os.chdir(Path(__file__).resolve().parent)
+    import config
+
+    parser = argparse.ArgumentParser(description="Atualiza as bases quando chegam exportações novas do Optimus.")
+    parser.add_argument('--pasta', default=config.PASTA_ENTRADA,
+                        help=f"pasta monitorada (padrão: {config.PASTA_ENTRADA})")
+    parser.add_argument('--intervalo', type=float, default=config.MONITOR_INTERVALO_S,
+                        help="segundos entre as verificações")
+    parser.add_argument('--estabilidade', type=float, default=config.MONITOR_ESTABILIDADE_S,
+                        help="segundos sem mudança para considerar a cópia concluída")
+    parser.add_argument('--uma-vez', action='store_true',
+                        help="faz uma verificação (aguardando a estabilidade) e termina")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    entrada = Path(args.pasta)
+    entrada.mkdir(parents=True, exist_ok=True)
+    vistos = {}
+
+    if args.uma_vez:
+        arquivos_prontos(entrada, vistos, args.estabilidade)
+        time.sleep(args.estabilidade)
+        verificar(entrada, vistos, args.estabilidade, config.HORARIOS_PICO)
+        return 0
+
+    log.info("Monitorando %s a cada %ss", entrada, args.intervalo)
+    try:
+        while True:
+            verificar(entrada, vistos, args.estabilidade, config.HORARIOS_PICO)
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
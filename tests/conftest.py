@@ -0,0 +1,208 @@
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import streamlit as st
+from openpyxl import Workbook
+
+# Os módulos do app (utils/, app_pages/) são importados a partir da raiz do projeto
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from utils.ingestao import CORE_XLS, TECNO_XLS, COLUNAS_CORRETIVAS, COLUNAS_TECNICOS
+
+EQUIPES = ['BRIGADA', 'MANUTENÇÃO GERAL', 'ELÉTRICA']
+TECNICOS = ['ANA', 'BRUNO', 'CARLA', 'DANIEL', 'EDU']
+
+
+@pytest.fixture
+def dados_legados(tmp_path, monkeypatch):
+    """Pasta `dados/` só com os CSV legados, sem nenhuma ingestão (nem snapshot) ainda."""
+    (tmp_path / 'dados').mkdir()
+    pd.DataFrame({
+        'Referência': ['2025-01', '2025-02'],
+        'TECNICO': ['ANA', 'BRUNO'],
+        'EQUIPE': ['BRIGADA', 'MANUTENÇÃO GERAL'],
+        'TIPO': ['Checklist', 'OS Corretiva'],
+        'Nº OS': [385, 172],
+        'Início': ['2025-01-01 07:19:00', '2025-02-01 09:08:00'],
+        'Término': ['2025-01-01 07:22:00', '2025-02-01 10:25:30'],
+        'Tempo': ['000:03', '001:17'],
+    }).to_csv(tmp_path / 'dados' / 'DBTecno_All.csv', index=False)
+    pd.DataFrame({
+        'Nº OS': [1000, 1001],
+        'STATUS': ['ATENDIDO', 'PENDENTE'],
+        'EQUIPE': ['BRIGADA', 'BRIGADA'],
+        'NATUREZA': ['CORRETIVA PLANEJADA', 'CORRETIVA EMERGENCIAL'],
+        'TIPO DE OS': ['Elétrica', 'Hidráulica'],
+        'Data/Hora Abertura': ['2025-01-02 08:00:00', '2025-01-03 08:00:00'],
+        'Data/Hora Início': ['2025-01-02 09:30:00', None],
+        'Data/Hora Término': ['2025-01-02 11:00:00', None],
+        'Atendimento': ['001:30', None],
+        'Solução': ['003:00', None],
+        'Execução': ['001:30', None],
+    }).to_csv(tmp_path / 'dados' / 'DBCorretivas.csv', index=False)
+    monkeypatch.chdir(tmp_path)
+    # Sem snapshot a versão é sempre 'legado': o cache de outro teste não pode ser reaproveitado
+    st.cache_data.clear()
+    return tmp_path
+
+
+@pytest.fixture
+def pasta_dados(tmp_path, monkeypatch):
+    """Pasta de trabalho vazia, com `dados/` para as exportações e os snapshots."""
+    (tmp_path / 'dados').mkdir()
+    monkeypatch.chdir(tmp_path)
+    st.cache_data.clear()
+    return tmp_path
+
+
+# ===============================
+# 📄 Exportações sintéticas do Optimus
+# ===============================
+
+def gravar_exportacao(arquivo: str, colunas: list, linhas: list, emissao: str):
+    """
+    Grava em `dados/arquivo` uma planilha no formato das exportações do Optimus: 6 linhas de título
+    (com a "Emissão:", em dd/mm/aaaa hh:mm:ss), o cabeçalho, as linhas e a linha de resumo final.
+    Colunas sem valor na linha ficam vazias; há sempre uma coluna que a ingestão não lê.
+    """
+    wb = Workbook()
+    ws = wb.active
+    for titulo in (['Optimus'], ['Relatório:', arquivo], ['Usuário:', 'geop'], ['Emissão:', emissao],
+                   ['Filtro:', '-'], ['Página:', '1']):
+        ws.append(titulo)
+    ws.append(['CLIENTE'] + colunas)
+    for linha in linhas:
+        ws.append(['Casapark'] + [linha.get(coluna) for coluna in colunas])
+    ws.append(['Relatório gerado em 1 segundos'])
+    wb.save(Path('dados') / arquivo)
+
+def gravar_corretivas(linhas: list, emissao: str = '08/05/2025 13:21:10', arquivo: str = CORE_XLS):
+    gravar_exportacao(arquivo, COLUNAS_CORRETIVAS, linhas, emissao)
+
+def gravar_tecnicos(linhas: list, emissao: str = '08/05/2025 13:23:09', arquivo: str = TECNO_XLS):
+    gravar_exportacao(arquivo, COLUNAS_TECNICOS, linhas, emissao)
+
+def _data_hora(momento: datetime, prefixo_data: str, prefixo_hora: str) -> dict:
+    if momento is None:
+        return {}
+    return {prefixo_data: momento.replace(hour=0, minute=0), prefixo_hora: momento.strftime('%H:%M')}
+
+def os_corretiva(numero: int, abertura: datetime, inicio: datetime = None, termino: datetime = None,
+                 status: str = 'ATENDIDO', natureza: str = 'CORRETIVA PLANEJADA', tipo: str = 'Elétrica') -> dict:
+    """Linha da exportação de OS corretivas."""
+    return {
+        'Nº OS': str(numero), 'ANDAR': 'DOCAS', 'ÁREA': 'SUB - SUBESTACAO', 'SOLICITANTE': 'JOÃO',
+        'DESCRIÇÃO': f'OS {numero}', 'STATUS': status, 'NATUREZA': natureza, 'TIPO DE OS': tipo,
+        'PROBLEMA': 'DEFEITO', 'TIPO DE EQUIPAMENTO': 'QUADRO', 'TAG EQUIPAMENTO': 'QD-01',
+        'SERVIÇO EXECUTADO': 'serviço executado' if termino else None, 'PRIORIDADE': '1',
+        **_data_hora(abertura, 'DATA DE ABERTURA', 'HORA DE ABERTURA'),
+        **_data_hora(inicio, 'DATA DE INÍCIO', 'HORA DE INÍCIO'),
+        **_data_hora(termino, 'DATA DE TÉRMINO', 'HORA DE TÉRMINO'),
+    }
+
+def atendimento(tecnico: str, equipe: str, tipo: str, numero: int, inicio: datetime, termino: datetime) -> dict:
+    """Linha da exportação do histórico de atendimento dos técnicos."""
+    return {
+        'TECNICO': tecnico, 'TIPO TECNICO': equipe, 'TIPO': tipo, 'ID': str(numero),
+        **_data_hora(inicio, 'DATA INICIO', 'HORA INICIO'),
+        **_data_hora(termino, 'DATA TERMINO', 'HORA TERMINO'),
+    }
+
+def exportacoes_sinteticas(n_os: int = 60, semente: int = 7) -> tuple:
+    """
+    OS corretivas e atendimentos de três meses, com OS pendentes, sem início, encerradas em meses
+    seguintes (backlog), de 1 a 3 técnicos, e checklists.
+    Returns:
+        tuple: (linhas de OS corretivas, linhas de atendimentos)
+    """
+    rnd = random.Random(semente)
+    corretivas, tecnicos = [], []
+    for numero in range(1000, 1000 + n_os):
+        abertura = datetime(2025, 1, 1, 7) + timedelta(days=rnd.randrange(90), minutes=rnd.randrange(720))
+        atendida = rnd.random() < 0.75
+        inicio = abertura + timedelta(minutes=rnd.randrange(10, 3000)) if atendida or rnd.random() < 0.4 else None
+        # Algumas OS só são encerradas semanas depois, já em outro mês
+        duracao = rnd.randrange(5, 600) if rnd.random() < 0.8 else rnd.randrange(60 * 24 * 10, 60 * 24 * 40)
+        termino = inicio + timedelta(minutes=duracao) if atendida else None
+        corretivas.append(os_corretiva(numero, abertura, inicio, termino, 'ATENDIDO' if atendida else 'PENDENTE',
+                                       rnd.choice(['CORRETIVA PLANEJADA', 'CORRETIVA EMERGENCIAL']),
+                                       rnd.choice(['Elétrica', 'Hidráulica', 'Civil'])))
+        if inicio is not None:
+            equipe = rnd.choice(EQUIPES)
+            for tecnico in rnd.sample(TECNICOS, rnd.randint(1, 3)):
+                tecnicos.append(atendimento(tecnico, equipe, 'OS Corretiva', numero, inicio,
+                                            termino or inicio + timedelta(minutes=30)))
+    for numero in range(400, 400 + n_os // 2):
+        inicio = datetime(2025, 1, 1, 7) + timedelta(days=rnd.randrange(90), minutes=rnd.randrange(720))
+        tecnicos.append(atendimento(rnd.choice(TECNICOS), 'BRIGADA', 'Checklist', numero, inicio,
+                                    inicio + timedelta(minutes=rnd.randrange(2, 40))))
+    return corretivas, tecnicos
+
+def _momento(linha: dict, data: str, hora: str):
+    if linha.get(data) is None:
+        return None
+    horas, minutos = map(int, linha[hora].split(':'))
+    return linha[data] + timedelta(hours=horas, minutes=minutos)
+
+def _encerrar(linha: dict, termino: datetime) -> dict:
+    """A mesma OS, atendida em `termino` (com início uma hora antes, se ainda não tinha)."""
+    abertura = _momento(linha, 'DATA DE ABERTURA', 'HORA DE ABERTURA')
+    inicio = _momento(linha, 'DATA DE INÍCIO', 'HORA DE INÍCIO') or termino - timedelta(hours=1)
+    return os_corretiva(int(linha['Nº OS']), abertura, inicio, termino, 'ATENDIDO', linha['NATUREZA'],
+                        linha['TIPO DE OS'])
+
+def versoes_exportacao() -> tuple:
+    """
+    Exportações de duas execuções seguidas. Na segunda: uma OS pendente foi atendida, uma OS teve o
+    término adiado para o mês seguinte, três OS são novas (uma num mês novo), duas sumiram (uma
+    delas com os atendimentos), um atendimento trocou de técnico e um checklist foi removido e
+    outro alterado.
+    Returns:
+        tuple: ((corretivas, técnicos) da primeira, (corretivas, técnicos) da segunda, Nº OS afetados)
+    """
+    corretivas, tecnicos = exportacoes_sinteticas()
+    novas_core, novos_tec = [dict(linha) for linha in corretivas], [dict(linha) for linha in tecnicos]
+    por_os = {int(linha['Nº OS']): i for i, linha in enumerate(novas_core)}
+    corretivas_os = [linha for linha in tecnicos if linha['TIPO'] == 'OS Corretiva']
+    com_atendimento = {int(linha['ID']) for linha in corretivas_os}
+
+    pendente = next(int(l['Nº OS']) for l in corretivas if l['STATUS'] == 'PENDENTE' and l.get('DATA DE INÍCIO') is None)
+    termino = _momento(novas_core[por_os[pendente]], 'DATA DE ABERTURA', 'HORA DE ABERTURA') + timedelta(hours=5)
+    novas_core[por_os[pendente]] = _encerrar(novas_core[por_os[pendente]], termino)
+    novos_tec.append(atendimento('ANA', 'ELÉTRICA', 'OS Corretiva', pendente, termino - timedelta(hours=1), termino))
+
+    adiada = next(int(l['Nº OS']) for l in corretivas if l['STATUS'] == 'ATENDIDO' and int(l['Nº OS']) in com_atendimento)
+    termino = _momento(novas_core[por_os[adiada]], 'DATA DE TÉRMINO', 'HORA DE TÉRMINO') + timedelta(days=35)
+    novas_core[por_os[adiada]] = _encerrar(novas_core[por_os[adiada]], termino)
+
+    abertura = datetime(2025, 4, 2, 9, 15)
+    for numero in range(2000, 2003):
+        inicio, fim = abertura + timedelta(hours=numero - 1999), abertura + timedelta(hours=numero - 1998)
+        novas_core.append(os_corretiva(numero, abertura, inicio, fim))
+        novos_tec.append(atendimento('EDU', 'BRIGADA', 'OS Corretiva', numero, inicio, fim))
+
+    removidas = [int(l['Nº OS']) for l in corretivas if int(l['Nº OS']) in com_atendimento][-2:]
+    novas_core = [l for l in novas_core if int(l['Nº OS']) not in removidas]
+    novos_tec = [l for l in novos_tec if not (l['TIPO'] == 'OS Corretiva' and int(l['ID']) == removidas[0])]
+
+    # Técnico trocado numa OS que, na exportação de OS, não mudou
+    trocado = next(i for i, l in enumerate(novos_tec) if l['TIPO'] == 'OS Corretiva'
+                   and int(l['ID']) not in (pendente, adiada, *removidas))
+    novos_tec[trocado] = {**novos_tec[trocado], 'TECNICO': 'FABIO'}
+
+    checklists = [i for i, l in enumerate(novos_tec) if l['TIPO'] == 'Checklist']
+    novos_tec[checklists[1]] = {**novos_tec[checklists[1]], 'HORA TERMINO': '23:59'}
+    del novos_tec[checklists[0]]
+
+    afetadas = {pendente, adiada, *removidas, int(novos_tec[trocado]['ID']), 2000, 2001, 2002}
+    return (corretivas, tecnicos), (novas_core, novos_tec), afetadas
+
+def gravar_versao(versao: tuple):
+    corretivas, tecnicos = versao
+    gravar_corretivas(corretivas)
+    gravar_tecnicos(tecnicos)
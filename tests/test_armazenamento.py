@@ -0,0 +1,14 @@
+from utils.armazenamento import ler_base
+
+
+def test_csv_legado_tecnicos_tem_tempo_min(dados_legados):
+    df = ler_base('DBTecno_All', colunas=['TECNICO', 'Início', 'Tempo_min'])
+    assert list(df.columns) == ['TECNICO', 'Início', 'Tempo_min']
+    # Minutos inteiros, como no 'HHH:MM' (os 30 s do segundo atendimento são truncados)
+    assert df['Tempo_min'].tolist() == [3.0, 77.0]
+
+
+def test_csv_legado_corretivas_tem_tempos_min(dados_legados):
+    df = ler_base('DBCorretivas', colunas=['Nº OS', 'Atendimento_min', 'Solução_min', 'Execução_min'])
+    assert df.loc[0, ['Atendimento_min', 'Solução_min', 'Execução_min']].tolist() == [90.0, 180.0, 90.0]
+    assert df.loc[1, ['Atendimento_min', 'Solução_min', 'Execução_min']].isna().all()
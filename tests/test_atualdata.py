@@ -0,0 +1,46 @@
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import utils.tarefas as tarefas
+from conftest import RAIZ
+
+
+@pytest.fixture
+def chamadas(monkeypatch):
+    """Argumentos de cada `processar_bases` iniciado pela página (sem processar nada)."""
+    registro = []
+
+    def processar_bases(**kwargs):
+        registro.append(kwargs)
+        return {'modo': 'completo', 'os_atualizadas': 0, 'leitura': {}}
+
+    monkeypatch.setattr(tarefas, 'processar_bases', processar_bases)
+    yield registro
+    # Uma tarefa ainda em andamento seria reaproveitada pelo próximo teste
+    while tarefas.tarefa_em_andamento():
+        time.sleep(0.05)
+
+def _atualizar(incremental: bool, chamadas: list) -> dict:
+    at = AppTest.from_file(str(RAIZ / 'app_pages' / 'atualdata.py'), default_timeout=30)
+    at.run()
+    at.toggle(key='incremental').set_value(incremental)
+    at.button[0].click().run()
+    for _ in range(50):
+        if chamadas:
+            break
+        time.sleep(0.1)
+    return chamadas[-1]
+
+
+def test_atualizacao_completa_forca_o_reprocessamento(chamadas):
+    argumentos = _atualizar(False, chamadas)
+    assert argumentos['incremental'] is False
+    assert argumentos['forcar'] is True
+
+
+def test_atualizacao_incremental_mantem_o_atalho_sem_alteracoes(chamadas):
+    argumentos = _atualizar(True, chamadas)
+    assert argumentos['incremental'] is True
+    assert argumentos['forcar'] is False
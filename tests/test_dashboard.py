@@ -0,0 +1,19 @@
+from app_pages.dashboard import carregar_cubo, carregar_indicadores
+from utils.armazenamento import versao_snapshot
+from utils.indicadores import MEDIDAS_CUBO
+
+
+def test_cubo_de_dados_so_com_csv_legado(dados_legados):
+    # Sem snapshot não há cubo gravado: o dashboard calcula o cubo a partir do CSV
+    versao = versao_snapshot()
+    assert versao == 'legado'
+    cubo = carregar_cubo(versao)
+    assert set(MEDIDAS_CUBO) <= set(cubo.columns)
+    assert cubo['abertas'].sum() == 2
+    assert cubo['soma Execução_min'].sum() == 90
+
+
+def test_indicadores_de_dados_so_com_csv_legado(dados_legados):
+    metricas, natureza, tipo = carregar_indicadores(versao_snapshot(), 'BRIGADA')
+    assert metricas[['OS Abertas', 'OS Atendidas']].iloc[0].tolist() == [2, 1]
+    assert metricas[['TME (h)', 'TMA (h)', 'TMS (h)']].iloc[0].tolist() == [1.5, 1.5, 3.0]
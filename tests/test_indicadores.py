@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from conftest import gravar_versao, versoes_exportacao
+from utils.armazenamento import ler_base
+from utils.indicadores import CHAVE_CUBO, atualizar_cubo, cubo_indicadores
+from utils.ingestao import DB_CORRETIVAS, processar_bases
+
+
+def _ordenado(cubo: pd.DataFrame) -> pd.DataFrame:
+    return cubo.sort_values(CHAVE_CUBO).reset_index(drop=True)
+
+def _fora(db: pd.DataFrame, numeros: set) -> pd.DataFrame:
+    return db[~db['Nº OS'].isin(numeros)].sort_values('Nº OS').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('inalteradas', [0, 10])
+def test_cubo_atualizado_igual_ao_recalculado(pasta_dados, inalteradas):
+    primeira, segunda, afetadas = versoes_exportacao()
+    gravar_versao(primeira)
+    processar_bases(paralelo=False)
+    antes = ler_base(DB_CORRETIVAS)
+    gravar_versao(segunda)
+    processar_bases(incremental=False, paralelo=False)
+    depois = ler_base(DB_CORRETIVAS)
+
+    # Fora das OS afetadas, as duas bases são iguais; OS inalteradas na troca não mudam o cubo
+    pd.testing.assert_frame_equal(_fora(antes, afetadas), _fora(depois, afetadas))
+    trocadas = afetadas | set(_fora(antes, afetadas)['Nº OS'].head(inalteradas))
+
+    cubo = atualizar_cubo(cubo_indicadores(antes), antes[antes['Nº OS'].isin(trocadas)],
+                          depois[depois['Nº OS'].isin(trocadas)])
+    pd.testing.assert_frame_equal(_ordenado(cubo), _ordenado(cubo_indicadores(depois)))
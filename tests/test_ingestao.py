@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from conftest import exportacoes_sinteticas, gravar_corretivas, gravar_tecnicos, gravar_versao, versoes_exportacao
+from utils.armazenamento import ler_base
+from utils.indicadores import CHAVE_CUBO, ler_cubo
+from utils.ingestao import CORE_XLS, TECNO_XLS, DB_CORRETIVAS, DB_TECNICOS, processar_bases
+
+CHAVE_TECNICOS = ['TIPO', 'Nº OS', 'TECNICO', 'Início', 'Término']
+
+
+def bases_atuais() -> dict:
+    """Bases e cubo do snapshot atual, em ordem canônica, para comparar execuções."""
+    return {
+        DB_CORRETIVAS: ler_base(DB_CORRETIVAS).sort_values('Nº OS').reset_index(drop=True),
+        DB_TECNICOS: ler_base(DB_TECNICOS).sort_values(CHAVE_TECNICOS).reset_index(drop=True),
+        'cubo': ler_cubo().sort_values(CHAVE_CUBO).reset_index(drop=True),
+    }
+
+def assert_bases_iguais(obtidas: dict, esperadas: dict):
+    for nome in esperadas:
+        pd.testing.assert_frame_equal(obtidas[nome], esperadas[nome], obj=nome)
+
+
+def test_incremental_igual_ao_completo(pasta_dados):
+    primeira, segunda, afetadas = versoes_exportacao()
+    gravar_versao(primeira)
+    assert processar_bases(paralelo=False)['modo'] == 'completo'
+
+    gravar_versao(segunda)
+    resumo = processar_bases(paralelo=False)
+    assert resumo['modo'] == 'incremental'
+    # Só as OS afetadas que ainda existem foram reprocessadas (as removidas só saem da base)
+    assert resumo['os_atualizadas'] == len(afetadas) - 2
+    incremental = bases_atuais()
+
+    assert processar_bases(incremental=False, paralelo=False, forcar=True)['modo'] == 'completo'
+    assert_bases_iguais(incremental, bases_atuais())
+
+
+@pytest.mark.parametrize('lote', [7, 5000])
+def test_lotes_igual_ao_completo(pasta_dados, lote):
+    gravar_versao(versoes_exportacao()[1])
+    assert processar_bases(paralelo=False)['modo'] == 'completo'
+    completo = bases_atuais()
+
+    resumo = processar_bases(forcar=True, lote=lote)
+    assert resumo['modo'] == 'completo em lotes'
+    assert_bases_iguais(bases_atuais(), completo)
+
+
+@pytest.mark.parametrize('lote', [None, 7])
+def test_exportacoes_sobrepostas_ficam_com_a_mais_recente(pasta_dados, lote):
+    corretivas, tecnicos = exportacoes_sinteticas()
+    gravar_versao((corretivas, tecnicos))
+    processar_bases(paralelo=False)
+    esperadas = bases_atuais()
+
+    # A exportação atual (nome sem sufixo, que vem antes na ordem de nome) cobre as OS 1020 a 1059
+    # e os checklists; a de janeiro, emitida antes, as OS 1000 a 1039, com 1020 a 1039 ainda em
+    # aberto, e os checklists com outro término
+    def recente(linha: dict) -> bool:
+        return linha.get('TIPO') == 'Checklist' or int(linha.get('Nº OS') or linha.get('ID')) >= 1020
+
+    def antiga(linha: dict) -> bool:
+        return linha.get('TIPO') == 'Checklist' or int(linha.get('Nº OS') or linha.get('ID')) < 1040
+
+    em_aberto = {'STATUS': 'PENDENTE', 'DATA DE TÉRMINO': None, 'HORA DE TÉRMINO': None}
+    gravar_corretivas([l for l in corretivas if recente(l)])
+    gravar_corretivas([{**l, **em_aberto} if recente(l) else l for l in corretivas if antiga(l)],
+                      emissao='01/02/2025 08:00:00', arquivo=CORE_XLS.replace('.xls', '_2025-01.xls'))
+    gravar_tecnicos([l for l in tecnicos if recente(l)])
+    gravar_tecnicos([{**l, 'HORA TERMINO': '23:59'} if recente(l) else l for l in tecnicos if antiga(l)],
+                    emissao='01/02/2025 08:05:00', arquivo=TECNO_XLS.replace('.xls', '_2025-01.xls'))
+
+    resumo = processar_bases(incremental=False, paralelo=False, forcar=True, lote=lote)
+    assert len(resumo['leitura']) == 4
+    assert_bases_iguais(bases_atuais(), esperadas)
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from conftest import gravar_versao, versoes_exportacao
+from metricas import hist_natureza, hist_tipo, metricascorretivas
+from utils.armazenamento import ler_base
+from utils.indicadores import TODAS_EQUIPES, equipes_cubo, indicadores_da_equipe, ler_cubo
+from utils.ingestao import DB_CORRETIVAS, processar_bases
+from utils.tools import duracao_em_minutos
+
+
+def _por_mes(tabela: pd.DataFrame) -> pd.DataFrame:
+    # `metricascorretivas` lista os meses na ordem em que aparecem na base; o cubo, em ordem
+    return tabela.sort_values('Referência').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('versao', [0, 1])
+def test_cubo_igual_a_referencia_por_equipe(pasta_dados, versao):
+    gravar_versao(versoes_exportacao()[versao])
+    processar_bases(paralelo=False)
+    db, cubo = ler_base(DB_CORRETIVAS), ler_cubo()
+
+    # Mesmo filtro do dashboard antes do cubo: a base inteira em TODOS, ou só as OS da equipe
+    equipes = [TODAS_EQUIPES] + equipes_cubo(cubo)
+    assert len(equipes) > 2
+    for equipe in equipes:
+        df = db if equipe == TODAS_EQUIPES else db[db['EQUIPE'] == equipe]
+        metricas, natureza, tipo = indicadores_da_equipe(cubo, equipe)
+        pd.testing.assert_frame_equal(metricas, _por_mes(metricascorretivas(df)), obj=f'métricas {equipe}')
+        pd.testing.assert_frame_equal(natureza, _por_mes(hist_natureza(df)), obj=f'natureza {equipe}')
+        pd.testing.assert_frame_equal(tipo, _por_mes(hist_tipo(df)), obj=f'tipo {equipe}')
+
+
+def test_tempos_medios_em_minutos_inteiros():
+    # 59 min 59 s de execução: pelas datas, 1,00 h; pela coluna em minutos (59), 0,98 h
+    df = pd.DataFrame({
+        'Data/Hora Abertura': pd.to_datetime(['2025-01-10 08:00:00']),
+        'Data/Hora Início': pd.to_datetime(['2025-01-10 08:00:00']),
+        'Data/Hora Término': pd.to_datetime(['2025-01-10 08:59:59']),
+    })
+    df['Execução_min'] = duracao_em_minutos(df['Data/Hora Término'] - df['Data/Hora Início'])
+    df['Atendimento_min'] = duracao_em_minutos(df['Data/Hora Início'] - df['Data/Hora Abertura'])
+    df['Solução_min'] = duracao_em_minutos(df['Data/Hora Término'] - df['Data/Hora Abertura'])
+
+    metricas = metricascorretivas(df)
+    assert metricas[['TME (h)', 'TMA (h)', 'TMS (h)']].iloc[0].tolist() == [0.98, 0.0, 0.98]
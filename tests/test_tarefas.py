@@ -0,0 +1,28 @@
+import time
+
+import utils.ingestao as ingestao
+from conftest import exportacoes_sinteticas, gravar_corretivas, gravar_tecnicos
+from utils.armazenamento import ler_base
+from utils.tarefas import iniciar_ingestao, estado_tarefa, tarefa_em_andamento
+
+
+def test_ingestao_em_segundo_plano_com_pool_de_processos(pasta_dados, monkeypatch):
+    corretivas, tecnicos = exportacoes_sinteticas()
+    gravar_corretivas(corretivas)
+    gravar_tecnicos(tecnicos)
+    contextos = []
+    contexto_processos = ingestao._contexto_processos
+    monkeypatch.setattr(ingestao, '_contexto_processos', lambda: contextos.append(contexto_processos()) or contextos[-1])
+
+    # A tarefa roda numa thread, como no servidor, e o `processar_bases` usa o pool (paralelo=True)
+    id_tarefa = iniciar_ingestao(incremental=False)
+    limite = time.monotonic() + 120
+    while tarefa_em_andamento() and time.monotonic() < limite:
+        time.sleep(0.1)
+
+    tarefa = estado_tarefa(id_tarefa)
+    assert tarefa['estado'] == 'concluída', tarefa['detalhes']
+    assert tarefa['resumo']['os_atualizadas'] == len(corretivas)
+    # Nenhum processo do pool sai de um fork do servidor, que tem outras threads
+    assert len(contextos) == 1 and contextos[0].get_start_method() in ('forkserver', 'spawn')
+    assert len(ler_base('DBCorretivas')) == len(corretivas)
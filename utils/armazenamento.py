@@ -0,0 +1,263 @@
+"""
+armazenamento.py
+
+Persistência das bases em Parquet (colunar, tipado e comprimido), particionado por mês:
+- `gravar_base`
+- `acrescentar_base`
+- `ler_base`
+- `caminho_base`
+- `existe_base`
+- `colunas_base`
+- `tipos_base`
+
+Tabelas pequenas, sem partições (indicadores materializados):
+- `gravar_tabela`
+- `ler_tabela`
+
+Snapshots das bases:
+- `criar_snapshot`
+- `publicar_snapshot`
+- `descartar_snapshot`
+- `pasta_atual`
+- `versao_snapshot`
+
+Cada base é um diretório `<snapshot>/<nome>/Referência=aaaa-mm/*.parquet`. Datas e categorias
+já ficam tipadas no arquivo, e a leitura carrega só as colunas e meses pedidos. As colunas
+categóricas seguem o esquema de `utils.esquema`, aplicado na gravação e na leitura.
+
+Cada ingestão grava um snapshot novo em `dados/snapshots/<id>/`, publicado ao final pela troca
+atômica do arquivo `dados/snapshots/ATUAL`. Até lá, os leitores continuam no snapshot anterior.
+As tabelas ficam ao lado das bases, em `<snapshot>/<nome>.parquet`.
+"""
+
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from utils.esquema import CATEGORIAS, TIPOS, aplicar_esquema
+from utils.tools import duracao_em_minutos
+
+PASTA_DADOS = Path('dados')
+PASTA_SNAPSHOTS = PASTA_DADOS / 'snapshots'
+ARQUIVO_ATUAL = PASTA_SNAPSHOTS / 'ATUAL'
+SNAPSHOTS_MANTIDOS = 2  # o atual e o anterior, que ainda pode estar sendo lido
+COLUNA_PARTICAO = 'Referência'
+COMPRESSAO = 'zstd'
+
+# Colunas de data das bases, usadas na leitura dos CSV legados
+COLUNAS_DATA = {
+    nome: [coluna for coluna, tipo in tipos.items() if tipo.startswith('datetime')]
+    for nome, tipos in TIPOS.items()
+}
+
+# Durações em minutos (início, fim) que a ingestão deriva das datas; os CSV legados foram
+# gravados sem elas e as recebem na leitura, com o mesmo esquema das bases em Parquet
+DURACOES_MIN = {
+    'DBCorretivas': {
+        'Atendimento_min': ('Data/Hora Abertura', 'Data/Hora Início'),
+        'Solução_min': ('Data/Hora Abertura', 'Data/Hora Término'),
+        'Execução_min': ('Data/Hora Início', 'Data/Hora Término'),
+    },
+    'DBTecno_All': {
+        'Tempo_min': ('Início', 'Término'),
+    },
+}
+
+
+# ===============================
+# 📸 Snapshots
+# ===============================
+
+def snapshot_atual() -> Optional[str]:
+    """Id do snapshot publicado, ou None se nenhum foi publicado ainda."""
+    try:
+        return ARQUIVO_ATUAL.read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def pasta_atual() -> Path:
+    """Pasta do snapshot publicado; sem snapshot, a própria pasta `dados` (bases legadas)."""
+    snapshot = snapshot_atual()
+    return PASTA_SNAPSHOTS / snapshot if snapshot else PASTA_DADOS
+
+def versao_snapshot() -> str:
+    """Identifica os dados publicados; serve de chave para os caches de leitura das páginas."""
+    return snapshot_atual() or 'legado'
+
+def criar_snapshot() -> Path:
+    """Cria a pasta de um snapshot novo, ainda não visível aos leitores."""
+    pasta = PASTA_SNAPSHOTS / f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    pasta.mkdir(parents=True)
+    return pasta
+
+def publicar_snapshot(pasta: Path):
+    """Torna o snapshot o atual, trocando o ponteiro `ATUAL` de forma atômica, e remove os antigos."""
+    temporario = ARQUIVO_ATUAL.with_name(f'.ATUAL.{uuid.uuid4().hex[:6]}')
+    temporario.write_text(pasta.name)
+    os.replace(temporario, ARQUIVO_ATUAL)
+
+    # Só snapshots anteriores ao publicado; os mais novos podem ser de outra ingestão em andamento
+    antigos = sorted(p for p in PASTA_SNAPSHOTS.iterdir() if p.is_dir() and p.name < pasta.name)
+    for antigo in antigos[:max(len(antigos) - (SNAPSHOTS_MANTIDOS - 1), 0)]:
+        shutil.rmtree(antigo, ignore_errors=True)
+
+def descartar_snapshot(pasta: Path):
+    """Remove um snapshot que não chegou a ser publicado."""
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+# ===============================
+# 🗄 Bases
+# ===============================
+
+def caminho_base(nome: str, pasta: Optional[Path] = None) -> Path:
+    """Diretório do dataset Parquet de uma base, no snapshot atual ou na `pasta` indicada."""
+    return (pasta or pasta_atual()) / nome
+
+def existe_base(nome: str, pasta: Optional[Path] = None) -> bool:
+    """Indica se a base já foi gravada (em Parquet ou no CSV legado)."""
+    caminho = caminho_base(nome, pasta)
+    return caminho.is_dir() or caminho.with_suffix('.csv').exists()
+
+def colunas_base(nome: str, pasta: Optional[Path] = None) -> list:
+    """Colunas gravadas na base, lidas só do esquema (sem carregar os dados). Lista vazia se não houver base."""
+    return list(tipos_base(nome, pasta))
+
+def tipos_base(nome: str, pasta: Optional[Path] = None) -> dict:
+    """
+    {coluna: tipo Arrow (ex.: 'int64', 'string')} da base, lido só do esquema. No CSV legado os
+    tipos são desconhecidos (None); sem base, dict vazio.
+    """
+    caminho = caminho_base(nome, pasta)
+    if caminho.is_dir():
+        esquema = ds.dataset(caminho, format='parquet', partitioning='hive').schema
+        return {campo.name: str(campo.type) for campo in esquema}
+    if caminho.with_suffix('.csv').exists():
+        return dict.fromkeys(list(pd.read_csv(caminho.with_suffix('.csv'), nrows=0).columns) + [COLUNA_PARTICAO])
+    return {}
+
+def gravar_base(df: pd.DataFrame, nome: str, pasta: Optional[Path] = None):
+    """
+    Grava a base em Parquet particionado pela coluna 'Referência' (aaaa-mm).
+    A gravação é feita em um diretório temporário que só então substitui o anterior.
+    Args:
+        df (pd.DataFrame): Base a gravar; precisa conter a coluna 'Referência'.
+        nome (str): Nome da base (ex.: 'DBCorretivas'); define o esquema das colunas categóricas.
+        pasta (Path): Snapshot de destino; por padrão, o snapshot atual.
+    """
+    df = aplicar_esquema(df.copy(), nome)
+
+    destino = caminho_base(nome, pasta)
+    temporario = destino.with_name(f'.{nome}.tmp')
+    antigo = destino.with_name(f'.{nome}.old')
+    shutil.rmtree(temporario, ignore_errors=True)
+    df.to_parquet(temporario, partition_cols=[COLUNA_PARTICAO], compression=COMPRESSAO, index=False)
+
+    shutil.rmtree(antigo, ignore_errors=True)
+    if destino.exists():
+        destino.rename(antigo)
+    temporario.rename(destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+def acrescentar_base(df: pd.DataFrame, nome: str, pasta: Path, parte: int):
+    """
+    Acrescenta um lote de linhas à base, em arquivos próprios (`parte-<parte>-*.parquet`) dentro
+    das partições de 'Referência'. Os tipos vêm de `utils.esquema`, não do lote, para que todos
+    os lotes gravem o mesmo esquema (um lote só com vazios numa coluna de texto continua texto).
+    Só deve ser usada em um snapshot ainda não publicado: as partes ficam visíveis a cada chamada.
+    """
+    df = aplicar_esquema(_tipar_lote(df.copy(), nome), nome)
+    tabela = pa.Table.from_pandas(df, schema=_esquema_arrow(df, nome), preserve_index=False)
+    pq.write_to_dataset(tabela, caminho_base(nome, pasta), partition_cols=[COLUNA_PARTICAO],
+                        compression=COMPRESSAO, basename_template=f'parte-{parte:05d}-{{i}}.parquet')
+
+def _tipar_lote(df: pd.DataFrame, nome: str) -> pd.DataFrame:
+    tipos = TIPOS.get(nome, {})
+    for coluna in df.columns:
+        if coluna in tipos:
+            df[coluna] = df[coluna].astype(tipos[coluna])
+        elif df[coluna].dtype != object and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype(object).where(df[coluna].notna(), None).map(str, na_action='ignore')
+    return df
+
+def _esquema_arrow(df: pd.DataFrame, nome: str) -> pa.Schema:
+    tipos, categorias = TIPOS.get(nome, {}), CATEGORIAS.get(nome, {})
+    campos = []
+    for coluna in df.columns:
+        if coluna in categorias:
+            tipo = pa.dictionary(pa.int32(), pa.string())
+        elif coluna in tipos:
+            tipo = pa.from_numpy_dtype(np.dtype(tipos[coluna]))
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(coluna, tipo))
+    return pa.schema(campos)
+
+def ler_base(nome: str, colunas: Optional[list] = None, referencias: Optional[list] = None,
+             pasta: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """
+    Lê uma base gravada por `gravar_base`, carregando apenas as colunas e meses pedidos.
+    Se o dataset Parquet ainda não existir, lê o CSV legado `dados/<nome>.csv`.
+    Args:
+        nome (str): Nome da base (ex.: 'DBCorretivas').
+        colunas (list): Colunas a carregar; None carrega todas.
+        referencias (list): Meses 'aaaa-mm' a carregar; None carrega todos.
+        pasta (Path): Snapshot de origem; por padrão, o snapshot atual.
+    Returns:
+        pd.DataFrame: Base lida, ou None se não houver base gravada.
+    """
+    caminho = caminho_base(nome, pasta)
+    if caminho.is_dir():
+        filtros = [(COLUNA_PARTICAO, 'in', list(referencias))] if referencias is not None else None
+        df = pd.read_parquet(caminho, columns=colunas, filters=filtros)
+    elif caminho.with_suffix('.csv').exists():
+        df = _ler_csv_legado(caminho.with_suffix('.csv'), nome, colunas, referencias)
+    else:
+        return None
+
+    if COLUNA_PARTICAO in df.columns:
+        # A partição volta como categoria do Parquet; a referência segue como texto 'aaaa-mm'
+        df[COLUNA_PARTICAO] = df[COLUNA_PARTICAO].astype(object)
+    return aplicar_esquema(df, nome)
+
+def _ler_csv_legado(caminho: Path, nome: str, colunas: Optional[list], referencias: Optional[list]) -> pd.DataFrame:
+    datas = COLUNAS_DATA.get(nome, [])
+    df = pd.read_csv(caminho, encoding='utf-8')
+    if 'Nº OS' in df.columns:
+        df['Nº OS'] = pd.to_numeric(df['Nº OS'], errors='coerce').fillna(0).astype('int64')
+    for col in datas:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col, (inicio, fim) in DURACOES_MIN.get(nome, {}).items():
+        if col not in df.columns:
+            df[col] = duracao_em_minutos(df[fim] - df[inicio])
+    if COLUNA_PARTICAO not in df.columns and datas:
+        df[COLUNA_PARTICAO] = df[datas[0]].dt.strftime('%Y-%m')
+    if referencias is not None:
+        df = df[df[COLUNA_PARTICAO].isin(referencias)]
+    return df.copy() if colunas is None else df[colunas].copy()
+
+
+# ===============================
+# 📈 Tabelas
+# ===============================
+
+def gravar_tabela(df: pd.DataFrame, nome: str, pasta: Optional[Path] = None):
+    """Grava uma tabela pequena em um arquivo Parquet só (`<nome>.parquet`), sem partições."""
+    destino = (pasta or pasta_atual()) / f'{nome}.parquet'
+    temporario = destino.with_name(f'.{nome}.tmp')
+    df.to_parquet(temporario, compression=COMPRESSAO, index=False)
+    os.replace(temporario, destino)
+
+def ler_tabela(nome: str, colunas: Optional[list] = None, pasta: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """Lê uma tabela gravada por `gravar_tabela`, ou None se ela não existir no snapshot."""
+    caminho = (pasta or pasta_atual()) / f'{nome}.parquet'
+    if not caminho.exists():
+        return None
+    return pd.read_parquet(caminho, columns=colunas)
@@ -0,0 +1,87 @@
+"""
+cache.py
+
+Cache em disco das etapas de ingestão, endereçado por conteúdo:
+- `versao_codigo`
+- `hash_arquivo`
+- `chave_etapa`
+- `ler_cache`
+- `gravar_cache`
+
+A chave de uma etapa combina o hash das suas entradas (arquivos e chaves das etapas de que
+depende) com a versão do código; entradas iguais reaproveitam o resultado gravado. As entradas
+menos usadas recentemente são descartadas quando o cache passa de `CACHE_INGESTAO_MAX_MB`.
+"""
+
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+from config import CACHE_INGESTAO_DIR, CACHE_INGESTAO_MAX_MB
+
+AUSENTE = object()
+
+
+@lru_cache(maxsize=1)
+def versao_codigo() -> str:
+    """Hash do código-fonte de `utils/`, onde ficam as etapas do pipeline."""
+    h = hashlib.sha256()
+    for arquivo in sorted(Path(__file__).parent.glob('*.py')):
+        h.update(arquivo.read_bytes())
+    return h.hexdigest()
+
+@lru_cache(maxsize=64)
+def _hash_conteudo(caminho: str, tamanho: int, modificado: int) -> str:
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def hash_arquivo(caminho) -> str:
+    """Hash do conteúdo do arquivo (memorizado enquanto tamanho e data de modificação não mudam)."""
+    info = os.stat(caminho)
+    return _hash_conteudo(str(caminho), info.st_size, info.st_mtime_ns)
+
+def chave_etapa(nome: str, kwargs: dict, chaves_dependencias: list, arquivos: list) -> str:
+    """Chave de cache de uma etapa a partir das suas entradas e da versão do código."""
+    h = hashlib.sha256()
+    h.update(versao_codigo().encode())
+    h.update(nome.encode())
+    h.update(repr(sorted(kwargs.items())).encode())
+    for chave in chaves_dependencias:
+        h.update(chave.encode())
+    for arquivo in arquivos:
+        h.update(hash_arquivo(arquivo).encode())
+    return h.hexdigest()
+
+def ler_cache(chave: str) -> Any:
+    """Retorna o valor gravado para a chave, ou `AUSENTE`. A leitura marca a entrada como recente."""
+    caminho = Path(CACHE_INGESTAO_DIR) / f'{chave}.pkl'
+    try:
+        with open(caminho, 'rb') as f:
+            valor = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return AUSENTE
+    os.utime(caminho)
+    return valor
+
+def gravar_cache(chave: str, valor: Any, limite_mb: Optional[int] = None):
+    """Grava o valor da chave e descarta as entradas mais antigas acima do limite de tamanho."""
+    pasta = Path(CACHE_INGESTAO_DIR)
+    pasta.mkdir(parents=True, exist_ok=True)
+    temporario = pasta / f'.{chave}.tmp'
+    with open(temporario, 'wb') as f:
+        pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, pasta / f'{chave}.pkl')
+    _aplicar_limite(pasta, (limite_mb or CACHE_INGESTAO_MAX_MB) * 1024 * 1024)
+
+def _aplicar_limite(pasta: Path, limite_bytes: int):
+    entradas = sorted(pasta.glob('*.pkl'), key=lambda p: p.stat().st_mtime, reverse=True)
+    total = 0
+    for entrada in entradas:
+        total += entrada.stat().st_size
+        if total > limite_bytes:
+            entrada.unlink(missing_ok=True)
@@ -0,0 +1,89 @@
+"""
+esquema.py
+
+Esquema compartilhado das colunas de baixa cardinalidade das bases:
+- `CATEGORIAS`
+- `TIPOS`
+- `aplicar_esquema`
+
+As colunas listadas são sempre categorias, com uma lista de valores estável: a gravação e a
+leitura das bases aplicam o mesmo esquema, então todas as páginas e sessões recebem o mesmo
+tipo, com os mesmos códigos, e os filtros e agrupamentos comparam inteiros em vez de strings.
+"""
+
+import pandas as pd
+
+# Domínios conhecidos das exportações do Optimus; a ordem é a de exibição
+STATUS = ['ABERTO', 'RECEBIDO', 'DESPACHADO', 'PENDENTE', 'ANDAMENTO', 'ATENDIDO']
+NATUREZAS = ['ACOMPANHAMENTO', 'CORRETIVA EMERGENCIAL', 'CORRETIVA PLANEJADA', 'OBRA E MELHORIA', 'PLANEJAMENTO']
+TIPOS_OS = [
+    'Comunicação visual', 'Elétrica', 'Hidráulica', 'Infiltração / vazamento', 'Isolamento de Área',
+    'Jardinagem', 'Limpeza', 'Outros', 'Pintura', 'Segurança', 'Serralheria', 'Serviços civil / tapumes',
+    'Serviços de Terceiros', 'Tratamento de Piso'
+]
+EQUIPES = ['BRIGADA', 'GARAGEM', 'GESTÃO', 'LIMPEZA E CONSERVAÇÃO', 'MANUTENÇÃO GERAL', 'T.I']
+ANDARES = [
+    'SUBSOLO L0', 'PAVIMENTO L1', 'PAVIMENTO L2', 'COBERTURA', 'DOCAS', 'GARAGEM DESCOBERTA',
+    'EXTERNO', 'ADMINISTRAÇÃO'
+]
+TIPOS_ATENDIMENTO = ['Checklist', 'OS Corretiva']
+
+# Colunas categóricas de cada base. Domínio vazio ([]) = domínio aberto (lojas, técnicos),
+# cujos valores entram em ordem alfabética
+CATEGORIAS = {
+    'DBCorretivas': {
+        'STATUS': STATUS,
+        'NATUREZA': NATUREZAS,
+        'TIPO DE OS': TIPOS_OS,
+        'EQUIPE': EQUIPES,
+        'ANDAR': ANDARES,
+        'ÁREA': [],
+    },
+    'DBTecno_All': {
+        'TECNICO': [],
+        'EQUIPE': EQUIPES,
+        'TIPO': TIPOS_ATENDIMENTO,
+    },
+}
+
+# Colunas não textuais de cada base; as demais são texto (as categóricas, texto com dicionário)
+TIPOS = {
+    'DBCorretivas': {
+        'Nº OS': 'int64',
+        'Data/Hora Abertura': 'datetime64[ns]',
+        'Data/Hora Início': 'datetime64[ns]',
+        'Data/Hora Término': 'datetime64[ns]',
+        'QTD_TECNICOS': 'int64',
+        'Atendimento_min': 'float64',
+        'Solução_min': 'float64',
+        'Execução_min': 'float64',
+        'TEMPO EXECUCAO': 'float64',  # sempre vazia nesta base (o tempo do técnico fica em DBTecno_All)
+    },
+    'DBTecno_All': {
+        'Nº OS': 'int64',
+        'Início': 'datetime64[ns]',
+        'Término': 'datetime64[ns]',
+        'Tempo_min': 'float64',
+    },
+}
+
+
+def aplicar_esquema(df: pd.DataFrame, nome: str) -> pd.DataFrame:
+    """
+    Converte as colunas categóricas da base `nome` para o tipo do esquema (no próprio DataFrame).
+    Valores fora do domínio conhecido não viram NaN: entram ao final da lista, em ordem alfabética.
+    """
+    for coluna, dominio in CATEGORIAS.get(nome, {}).items():
+        if coluna not in df.columns:
+            continue
+        categorica = isinstance(df[coluna].dtype, pd.CategoricalDtype)
+        valores = df[coluna].cat.categories if categorica else df[coluna].dropna().unique()
+        conhecidos = set(dominio)
+        categorias = list(dominio) + sorted((v for v in valores if v not in conhecidos), key=str)
+        # A igualdade de CategoricalDtype ignora a ordem (e o `astype` também): a ordem das
+        # categorias é comparada à parte e reaplicada com `set_categories`
+        if not categorica:
+            df[coluna] = df[coluna].astype(pd.CategoricalDtype(categorias))
+        elif list(df[coluna].cat.categories) != categorias:
+            df[coluna] = df[coluna].cat.set_categories(categorias)
+    return df
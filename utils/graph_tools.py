@@ -1,10 +1,27 @@
 import plotly.express as px
+import streamlit as st
+from config import FIGURAS_CACHE_MAX
+
+# Cache de figuras: compartilhado entre as sessões; acima de FIGURAS_CACHE_MAX figuras, descarta
+# as usadas há mais tempo. As figuras não são alteradas na exibição (o st.plotly_chart só as lê)
+@st.cache_resource(max_entries=FIGURAS_CACHE_MAX, show_spinner=False)
+def _figura(chave: tuple, _construir):
+    return _construir()
+
+def figura_em_cache(versao: str, pagina: str, nome: str, construir, **filtros):
+    """
+    Figura `nome` da `pagina`, construída por `construir()` só na primeira vez para a versão do
+    snapshot e a seleção de filtros; as exibições seguintes, de qualquer sessão, reaproveitam-na.
+    """
+    return _figura((versao, pagina, nome, tuple(sorted(filtros.items()))), construir)
+
 
 def grafico_tempo_medio(df, tipo='TECNICO'):
     """
     Gera um gráfico de barras com o tempo médio por técnico, equipe ou tipo.
+    Usa a coluna numérica 'Tempo_min' da base de técnicos, sem conversão de texto.
     """
-    df_medias = df.groupby(tipo)['Tempo_min'].mean().reset_index()
+    df_medias = df.groupby(tipo, observed=True)['Tempo_min'].mean().reset_index()
     fig = px.bar(df_medias, x=tipo, y='Tempo_min', title=f'Tempo Médio por {tipo}')
     fig.update_layout(
         xaxis_title=tipo,
@@ -0,0 +1,182 @@
+"""
+indicadores.py
+
+Cubo de indicadores do dashboard, materializado na ingestão:
+- `cubo_indicadores`
+- `somar_cubos`
+- `atualizar_cubo`
+- `gravar_cubo`
+- `ler_cubo`
+- `equipes_cubo`
+- `indicadores_da_equipe`
+
+Cada ingestão grava, ao lado das bases, um cubo pré-agregado com medidas aditivas (contagens de
+OS e somas de tempos) por Referência × EQUIPE × NATUREZA × TIPO DE OS × STATUS. Os cartões e
+gráficos do dashboard saem de fatias somadas do cubo: as métricas mensais de
+`metricascorretivas` e as tabelas de `hist_natureza` e `hist_tipo`, de todas as equipes juntas
+(`TODAS_EQUIPES`) ou de uma só. O cubo tem o tamanho das combinações observadas, e não o do
+histórico de OS.
+
+Cada OS contribui só no mês de abertura (abertas, atendidas, pendentes e tempos) e, nos backlogs
+atendidos, no mês do término; o backlog de cada mês é a soma das pendentes dos meses anteriores.
+Assim, a ingestão incremental atualiza o cubo somando a contribuição das OS novas ou alteradas e
+subtraindo a das versões anteriores, sem reler a base.
+"""
+
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+from utils.armazenamento import gravar_tabela, ler_tabela
+from utils.esquema import aplicar_esquema
+from utils.tools import arredondar_horas
+
+TODAS_EQUIPES = 'TODOS'
+TABELA_CUBO = 'DBInd_Cubo'
+
+# Chave do cubo: mês do evento (abertura ou término) e as dimensões categóricas da OS
+CATEGORIAS_CUBO = ['EQUIPE', 'NATUREZA', 'TIPO DE OS', 'STATUS']
+CHAVE_CUBO = ['Referência'] + CATEGORIAS_CUBO
+
+# Colunas de tempo (minutos) e a métrica mensal (horas) de cada uma
+TEMPOS = {
+    'Execução_min': 'TME (h)',
+    'Atendimento_min': 'TMA (h)',
+    'Solução_min': 'TMS (h)',
+}
+MEDIDAS_CUBO = ['abertas', 'atendidas', 'pendentes', 'backlog_atendidos'] + [
+    f'{medida} {coluna}' for coluna in TEMPOS for medida in ('soma', 'n')]
+
+# Colunas da DBCorretivas usadas no cubo
+COLUNAS_INDICADORES = CATEGORIAS_CUBO + [
+    'Data/Hora Abertura', 'Data/Hora Início', 'Data/Hora Término', 'Atendimento_min', 'Solução_min', 'Execução_min'
+]
+
+
+# ===============================
+# 🧊 Cubo
+# ===============================
+
+def _concatenar(partes: list) -> pd.DataFrame:
+    # Partes vazias não entram no concat (e não mudam os tipos das colunas); fica ao menos uma
+    return pd.concat([parte for parte in partes if len(parte)] or partes[:1], ignore_index=True)
+
+def _somar(partes: list) -> pd.DataFrame:
+    """Soma as partes pela chave do cubo; as células que zeram todas as medidas deixam de existir."""
+    cubo = _concatenar(partes)
+    # Partes com categorias diferentes (lotes, deltas) voltam como texto: reaplica o esquema da base
+    cubo[CATEGORIAS_CUBO] = aplicar_esquema(cubo[CATEGORIAS_CUBO].copy(), 'DBCorretivas')
+    cubo = cubo.groupby(CHAVE_CUBO, observed=True, dropna=False)[MEDIDAS_CUBO].sum().reset_index()
+    return cubo[(cubo[MEDIDAS_CUBO] != 0).any(axis=1)].reset_index(drop=True)
+
+def _contribuicoes(db_corretivas: pd.DataFrame, sinal: int = 1) -> pd.DataFrame:
+    """Contribuição de cada OS ao cubo (multiplicada por `sinal`), ainda sem somar pela chave."""
+    abertura = db_corretivas['Data/Hora Abertura']
+    termino = db_corretivas['Data/Hora Término']
+    atendida = termino.notna()
+    executada = atendida & db_corretivas['Data/Hora Início'].notna()
+
+    # No mês de abertura: OS abertas, atendidas, ainda pendentes e os tempos das executadas
+    por_abertura = db_corretivas[CATEGORIAS_CUBO].copy()
+    por_abertura.insert(0, 'Referência', abertura.dt.strftime('%Y-%m'))
+    por_abertura['abertas'] = sinal
+    por_abertura['atendidas'] = atendida * sinal
+    por_abertura['pendentes'] = ~atendida * sinal
+    por_abertura['backlog_atendidos'] = 0
+    for coluna in TEMPOS:
+        valido = executada & db_corretivas[coluna].notna()
+        por_abertura[f'soma {coluna}'] = db_corretivas[coluna].where(valido, 0.0) * sinal
+        por_abertura[f'n {coluna}'] = valido * sinal
+
+    # No mês do término: OS abertas antes dele e encerradas até o último dia (às 00:00, como em
+    # `metricascorretivas`)
+    inicio_mes = termino.dt.to_period('M').dt.start_time
+    atendido_backlog = (abertura < inicio_mes) & (termino <= inicio_mes + pd.offsets.MonthEnd(0))
+    por_termino = db_corretivas.loc[atendido_backlog, CATEGORIAS_CUBO].copy()
+    por_termino.insert(0, 'Referência', termino[atendido_backlog].dt.strftime('%Y-%m'))
+    por_termino['backlog_atendidos'] = sinal
+    por_termino = por_termino.reindex(columns=por_abertura.columns, fill_value=0)
+
+    return _concatenar([por_abertura[abertura.notna()], por_termino])
+
+def cubo_indicadores(db_corretivas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cubo dos indicadores, a partir das linhas da DBCorretivas.
+    Returns:
+        pd.DataFrame: Uma linha por célula observada de `CHAVE_CUBO`, com as `MEDIDAS_CUBO`.
+    """
+    return _somar([_contribuicoes(db_corretivas)])
+
+def somar_cubos(*cubos: pd.DataFrame) -> pd.DataFrame:
+    """Soma os cubos de partes disjuntas da base (ex.: os lotes do processamento em lotes)."""
+    return _somar(list(cubos))
+
+def atualizar_cubo(cubo: pd.DataFrame, antigas: pd.DataFrame, novas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cubo da base depois de trocar as linhas `antigas` da DBCorretivas pelas `novas`: só mudam
+    as células dos meses de abertura e de término dessas OS.
+    """
+    return _somar([cubo, _contribuicoes(novas), _contribuicoes(antigas, sinal=-1)])
+
+
+# ===============================
+# 📊 Fatias do dashboard
+# ===============================
+
+def equipes_cubo(cubo: pd.DataFrame) -> list:
+    """Equipes com OS no cubo, em ordem alfabética."""
+    return sorted(cubo['EQUIPE'].dropna().unique().tolist())
+
+def _fatia(cubo: pd.DataFrame, equipe: str) -> pd.DataFrame:
+    return cubo if equipe == TODAS_EQUIPES else cubo[cubo['EQUIPE'] == equipe]
+
+def _metricas(fatia: pd.DataFrame) -> pd.DataFrame:
+    """Métricas mensais da fatia, com as colunas de `metricascorretivas`."""
+    mensal = fatia.groupby('Referência')[MEDIDAS_CUBO].sum()
+    # Backlog: OS ainda sem término, abertas nos meses anteriores
+    backlog = mensal['pendentes'].cumsum() - mensal['pendentes']
+    mes = mensal['abertas'] > 0
+    mensal, backlog = mensal[mes], backlog[mes]
+    metricas = pd.DataFrame({
+        'Referência': mensal.index.values,
+        'Backlogs': backlog.values,
+        'OS Abertas': mensal['abertas'].values,
+        'OS Não Atendidas': (mensal['abertas'] - mensal['atendidas']).values,
+        'OS Atendidas': mensal['atendidas'].values,
+        'Backlogs Atendidos': mensal['backlog_atendidos'].values,
+    })
+    for coluna, metrica in TEMPOS.items():
+        metricas[metrica] = arredondar_horas(mensal[f'soma {coluna}'] / mensal[f'n {coluna}'] / 60)
+    metricas['% Atendimento'] = ((metricas['OS Atendidas'] / metricas['OS Abertas']) * 100).round(1)
+    return metricas
+
+def _contagem(fatia: pd.DataFrame, dimensao: str) -> pd.DataFrame:
+    """OS abertas por mês e por valor de `dimensao`, no formato de `hist_natureza`/`hist_tipo`."""
+    abertas = fatia[fatia['abertas'] > 0]
+    tabela = abertas.groupby(['Referência', dimensao], observed=True)['abertas'].sum()
+    tabela = tabela.unstack(fill_value=0).reset_index()
+    tabela.index.name = None
+    return tabela
+
+def indicadores_da_equipe(cubo: pd.DataFrame, equipe: str = TODAS_EQUIPES) -> tuple:
+    """
+    Indicadores de uma equipe (ou de todas), nos formatos de `metricascorretivas`, `hist_natureza`
+    e `hist_tipo`.
+    Returns:
+        tuple: (métricas, natureza, tipo)
+    """
+    fatia = _fatia(cubo, equipe)
+    return _metricas(fatia), _contagem(fatia, 'NATUREZA'), _contagem(fatia, 'TIPO DE OS')
+
+
+# ===============================
+# 💾 Gravação e leitura
+# ===============================
+
+def gravar_cubo(cubo: pd.DataFrame, pasta: Optional[Path] = None) -> int:
+    """Grava o cubo no snapshot (por padrão, o atual). Retorna o número de células."""
+    gravar_tabela(cubo, TABELA_CUBO, pasta)
+    return len(cubo)
+
+def ler_cubo(pasta: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """Cubo gravado por `gravar_cubo`, ou None se o snapshot ainda não o tiver."""
+    return ler_tabela(TABELA_CUBO, pasta=pasta)
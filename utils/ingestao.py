@@ -0,0 +1,856 @@
+"""
+ingestao.py
+
+Pipeline de ingestão das exportações do Optimus, sem dependência da interface:
+- Consolidação de várias exportações de cada base ("a exportação mais recente vence")
+- Normalização das OS corretivas e do histórico dos técnicos
+- Montagem das bases DBCorretivas e DBTecno_All
+- Atualização incremental (delta) por Nº OS
+- Execução das etapas como grafo de dependências, em paralelo e com cache por conteúdo
+- Processamento completo em lotes de linhas, com memória limitada (`lote`)
+- Gravação em um snapshot novo, publicado só ao final da execução
+- Cubo de indicadores do dashboard materializado no snapshot, atualizado só nos meses afetados
+- Medição de tempo, linhas e pico de memória de cada etapa (`medir=True`)
+"""
+
+import math
+import multiprocessing
+import os
+import pickle
+import shutil
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from utils.tools import (combinar_data_hora, duracao_em_minutos, serie_minutos_para_hhhmm, load_excel,
+                         ler_excel_em_lotes, emissao_exportacao)
+from utils.armazenamento import (gravar_base, acrescentar_base, ler_base, existe_base, tipos_base, pasta_atual,
+                                  criar_snapshot, publicar_snapshot, descartar_snapshot)
+from utils.cache import AUSENTE, chave_etapa, ler_cache, gravar_cache
+from utils.indicadores import cubo_indicadores, somar_cubos, atualizar_cubo, gravar_cubo, ler_cubo
+
+CORE_XLS = 'historico_oss_corretivas.xls'
+TECNO_XLS = 'relatorio_historico_atendimento.xls'
+
+DB_CORRETIVAS = 'DBCorretivas'
+DB_TECNICOS = 'DBTecno_All'
+ESTADO_CORRETIVAS = 'DBEstado_Corretivas.csv'
+ESTADO_TECNICOS = 'DBEstado_Tecnicos.csv'
+ESTADO_ENTRADAS = 'DBEstado_Entradas.txt'
+
+# Colunas das exportações efetivamente usadas pelos normalizadores; as demais nem são lidas
+COLUNAS_CORRETIVAS = [
+    'Nº OS', 'ANDAR', 'ÁREA', 'SOLICITANTE', 'DESCRIÇÃO', 'STATUS', 'NATUREZA', 'TIPO DE OS', 'PROBLEMA',
+    'TIPO DE EQUIPAMENTO', 'TAG EQUIPAMENTO', 'SERVIÇO EXECUTADO', 'OBSERVAÇÃO', 'PRIORIDADE',
+    'DATA DE ABERTURA', 'HORA DE ABERTURA', 'DATA DE INÍCIO', 'HORA DE INÍCIO', 'DATA DE TÉRMINO', 'HORA DE TÉRMINO'
+]
+COLUNAS_TECNICOS = [
+    'TECNICO', 'TIPO TECNICO', 'TIPO', 'ID', 'DATA INICIO', 'HORA INICIO', 'DATA TERMINO', 'HORA TERMINO'
+]
+
+# Campos que identificam uma alteração na OS entre duas exportações
+ASSINATURA_CORRETIVAS = [
+    'STATUS', 'DATA DE ABERTURA', 'HORA DE ABERTURA', 'DATA DE INÍCIO', 'HORA DE INÍCIO',
+    'DATA DE TÉRMINO', 'HORA DE TÉRMINO'
+]
+ASSINATURA_TECNICOS = ['TECNICO', 'TIPO TECNICO', 'DATA INICIO', 'HORA INICIO', 'DATA TERMINO', 'HORA TERMINO']
+
+# Esquema das bases gravadas; bases sem alguma dessas colunas (ou com o Nº OS em texto) são refeitas por completo
+COLUNAS_DB_CORRETIVAS = [
+    'Referência', 'Nº OS', 'STATUS', 'ANDAR', 'ÁREA', 'TIPO DE OS', 'NATUREZA', 'SOLICITANTE', 'DESCRIÇÃO','SERVIÇO EXECUTADO',
+    'QTD_TECNICOS', 'TECNICO', 'EQUIPE', 'Data/Hora Abertura', 'Data/Hora Início',
+    'Data/Hora Término', 'Atendimento', 'Solução', 'Execução', 'TEMPO EXECUCAO',
+    'Atendimento_min', 'Solução_min', 'Execução_min'
+]
+COLUNAS_DB_TECNICOS = [
+    'Referência', 'TECNICO', 'EQUIPE', 'TIPO', 'Nº OS', 'Início', 'Término', 'Tempo', 'Tempo_min'
+]
+
+
+# ===============================
+# 🧹 Normalização
+# ===============================
+
+def numero_os(serie: pd.Series) -> pd.Series:
+    """Nº OS como inteiro (int64), a chave das duas bases; valores não numéricos viram 0."""
+    return pd.to_numeric(serie, errors='coerce').fillna(0).astype('int64')
+
+# Coloca Campo Data e Campo Hora em Unico campo DATAHORA
+def normalizar_datas(df: pd.DataFrame, col_data: str, col_hora: str, col_destino: str):
+    df[col_data] = pd.to_datetime(df[col_data], format='%d/%m/%Y', errors='coerce')
+    df[col_destino] = combinar_data_hora(df[col_data], df[col_hora])
+
+def normalize_corretivas(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    df['Nº OS'] = numero_os(df['Nº OS'])
+
+    # Coloca Campo Data e Campo Hora em Unico campo DATAHORA
+    normalizar_datas(df, 'DATA DE ABERTURA', 'HORA DE ABERTURA', 'DTH_ABERTURA')
+    normalizar_datas(df, 'DATA DE INÍCIO', 'HORA DE INÍCIO', 'DTH_INICIO')
+
+    if 'DATA DE TÉRMINO' in df.columns and 'HORA DE TÉRMINO' in df.columns:
+        normalizar_datas(df, 'DATA DE TÉRMINO', 'HORA DE TÉRMINO', 'DTH_TERMINO')
+    else:
+        df['DTH_TERMINO'] = pd.NaT
+    # Converte PRIORIDADE para inteiro
+    df['PRIORIDADE'] = pd.to_numeric(df['PRIORIDADE'], errors='coerce').fillna(0).astype(int)
+
+    # Elimina colunas desnecessárias
+    df.drop(columns=[
+        "CLIENTE", "TIPO DE NEGÓCIO", "LOCAL", "TELEFONE", "E-MAIL", "FAMÍLIA",
+        "DATA MÁXIMA ATENDIMENTO", "HORA MÁXIMA ATENDIMENTO", "DATA DE FECHAMENTO",
+        "HORA DE FECHAMENTO", "TEMPO DE SERVIÇO", "NOME TÉCNICO (ASSINATURA)", "CONTRATO",
+        "PRESTADOR", "EMPRESA", "NO PRAZO", "AVALIAÇÃO", "MOTIVO PENDÊNCIA", "NOTA PESQUISA",
+        "COMENTÁRIO PESQUISA", "QTD REABERTURA", "VALOR DE MATERIAL", "VALOR DE DESPESAS",
+        "VALOR DE SERVIÇO", "VALOR TOTAL", "COMENTÁRIOS DA OS",
+        "DATA DE ABERTURA", "HORA DE ABERTURA", "DATA DE INÍCIO", "HORA DE INÍCIO",
+        "DATA DE TÉRMINO", "HORA DE TÉRMINO"
+    ], errors='ignore', inplace=True)
+
+    # Cria Tempos de Atendimento, Solução e Execução
+    # TS = Tempo de Solução     = DTH_TERMINO - DTH_ABERTURA
+    # TA = Tempo de Atendimento = DTH_INICIO - DTH_ABERTURA
+    # TE = Tempo de Execução    = DTH_TERMINO - DTH_INICIO
+    # Tempos de Atendimento se OS não estiverem atendidas
+    # TS_MIN, TA_MIN e TE_MIN guardam os mesmos tempos em minutos, sempre que houver as duas datas
+    atendido = df['STATUS'] == 'ATENDIDO'
+    for coluna, fim, inicio in (
+        ('TS', 'DTH_TERMINO', 'DTH_ABERTURA'),
+        ('TA', 'DTH_INICIO', 'DTH_ABERTURA'),
+        ('TE', 'DTH_TERMINO', 'DTH_INICIO'),
+    ):
+        minutos = duracao_em_minutos(df[fim] - df[inicio])
+        df[f'{coluna}_MIN'] = minutos
+        df[coluna] = serie_minutos_para_hhhmm(minutos.where(atendido), vazio=None)
+
+    return df
+
+def normalize_cortecnicos(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Normaliza dados de técnicos e calcula tempo de execução."""
+    normalizar_datas(df, 'DATA INICIO', 'HORA INICIO', 'INICIO')
+
+    if 'DATA TERMINO' in df.columns and 'HORA TERMINO' in df.columns:
+        normalizar_datas(df, 'DATA TERMINO', 'HORA TERMINO', 'TERMINO')
+    else:
+        df['TERMINO'] = pd.NaT
+
+    df['Nº OS'] = numero_os(df['ID'])
+    df['Tempo_min'] = duracao_em_minutos(df['TERMINO'] - df['INICIO'])
+    df['TEMPO EXECUCAO'] = serie_minutos_para_hhhmm(df['Tempo_min'], vazio=None)
+    df.columns = df.columns.str.strip()
+    #df = df[df['TIPO'] == 'OS Corretiva']
+
+    drop_cols = ["IS", "TIPO DE NEGÓCIO", "LOCAL", "DATA INICIO", "HORA INICIO", "DATA TERMINO", "HORA TERMINO"]
+    df.drop(columns=drop_cols, errors='ignore', inplace=True)
+    df.rename(columns={
+            'TIPO TECNICO': 'EQUIPE',
+            'DTH_ABERTURA': 'Data/Hora Abertura',
+            'INICIO': 'Início',
+            'TERMINO': 'Término',
+            'TEMPO EXECUCAO': 'Tempo'
+        }, inplace=True)    
+
+    df['Referência'] = df['Início'].dt.strftime('%Y-%m')
+
+    df = df.reindex(columns=COLUNAS_DB_TECNICOS)
+    return df.copy()
+
+def indexar_por_os(df: pd.DataFrame, colunas: list, linhas=slice(None)) -> pd.DataFrame:
+    """
+    Seleciona `linhas` e `colunas` de `df` indexadas pelo Nº OS, em ordem crescente; linhas da
+    mesma OS mantêm a ordem original. Uma só cópia dos dados, e nenhuma ordenação se já estiverem
+    em ordem (como nas exportações, que vêm por Nº OS).
+    """
+    indexado = df.loc[linhas, colunas]
+    indexado.index = pd.Index(df.loc[linhas, 'Nº OS'].to_numpy(), name='Nº OS')
+    return indexado if indexado.index.is_monotonic_increasing else indexado.sort_index(kind='stable')
+
+def db_corretivas_all(corretivas: pd.DataFrame, cortecnicos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Junta cada OS aos seus atendimentos de OS corretiva. A junção é feita pelos índices de Nº OS
+    (inteiros e ordenados), sem a tabela de hash de um merge; o resultado fica indexado por Nº OS.
+    """
+    core_cols = [
+        'ANDAR', 'ÁREA', 'SOLICITANTE', 'DESCRIÇÃO', 'STATUS', 'NATUREZA',
+        'TIPO DE OS', 'PROBLEMA', 'TIPO DE EQUIPAMENTO', 'TAG EQUIPAMENTO',
+        'SERVIÇO EXECUTADO', 'OBSERVAÇÃO', 'PRIORIDADE', 'DTH_ABERTURA', 'DTH_INICIO',
+        'DTH_TERMINO', 'TS', 'TA', 'TE', 'TS_MIN', 'TA_MIN', 'TE_MIN'
+    ]
+
+    tecno_cols = ['TECNICO', 'EQUIPE', 'TIPO', 'Início', 'Término','Tempo']
+    corretiva = (cortecnicos['TIPO'] == 'OS Corretiva').to_numpy()
+    return indexar_por_os(corretivas, core_cols).join(indexar_por_os(cortecnicos, tecno_cols, corretiva), how='left')
+
+# Colunas da OS em que vale o primeiro valor preenchido do grupo
+COLUNAS_PRIMEIRO = [
+    'STATUS', 'ANDAR', 'ÁREA', 'PROBLEMA', 'OBSERVAÇÃO', 'TIPO DE OS', 'NATUREZA', 'SOLICITANTE',
+    'DESCRIÇÃO', 'TIPO DE EQUIPAMENTO', 'TAG EQUIPAMENTO', 'SERVIÇO EXECUTADO', 'EQUIPE', 'TIPO',
+    'DTH_ABERTURA', 'DTH_INICIO', 'DTH_TERMINO', 'TA', 'TS', 'TE', 'TA_MIN', 'TS_MIN', 'TE_MIN'
+]
+
+def agrupa_db(corretivas_all: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrupa a base completa (indexada por Nº OS, como sai de `db_corretivas_all`) em uma linha
+    por OS, com os técnicos distintos (na ordem em que aparecem) e a quantidade deles. Não há
+    funções Python por grupo: os campos da OS saem de um único `first()` e a lista de técnicos
+    da soma de strings do groupby, sobre os pares (OS, técnico) sem repetição.
+    """
+    agrupado = corretivas_all.groupby(level='Nº OS')[COLUNAS_PRIMEIRO].first()
+
+    tecnicos = corretivas_all['TECNICO'].dropna().reset_index().drop_duplicates()
+    por_os = (tecnicos['TECNICO'].astype(str) + ', ').groupby(tecnicos['Nº OS'])
+    agrupado['TECNICO'] = por_os.sum().str[:-2].reindex(agrupado.index, fill_value='')
+    agrupado['QTD_TECNICOS'] = por_os.size().reindex(agrupado.index, fill_value=0)
+    agrupado = agrupado.reset_index()
+
+    agrupado.rename(columns={
+        'TIPO TECNICO': 'EQUIPE',
+        'DTH_ABERTURA': 'Data/Hora Abertura',
+        'DTH_INICIO': 'Data/Hora Início',
+        'DTH_TERMINO': 'Data/Hora Término',
+        'TA': 'Atendimento',
+        'TS': 'Solução',
+        'TE': 'Execução',
+        'TA_MIN': 'Atendimento_min',
+        'TS_MIN': 'Solução_min',
+        'TE_MIN': 'Execução_min'
+    }, inplace=True)
+    agrupado['Referência'] = agrupado['Data/Hora Abertura'].dt.strftime('%Y-%m')
+    return agrupado.reindex(columns=COLUNAS_DB_CORRETIVAS)
+
+
+# ===============================
+# 📚 Consolidação de Exportações
+# ===============================
+
+def arquivos_exportacao(modelo: str, pasta: Path = Path('dados')) -> list:
+    """
+    Exportações de uma base na pasta, em ordem de nome: o próprio `modelo` e os arquivos com o
+    mesmo prefixo (ex.: `historico_oss_corretivas_2025-01.xls` para CORE_XLS).
+    """
+    prefixo = Path(modelo).stem
+    return sorted(p.name for p in pasta.glob(f'{prefixo}*')
+                  if p.is_file() and p.suffix.lower() in ('.xls', '.xlsx'))
+
+def ordem_exportacoes(emissoes: list) -> list:
+    """
+    Índices das exportações da mais antiga para a mais recente, pela data de emissão (ISO).
+    Exportações sem data contam como as mais antigas; no empate, vale a ordem recebida (a de nome).
+    """
+    return sorted(range(len(emissoes)), key=lambda i: (emissoes[i] is not None, emissoes[i] or ''))
+
+def manter_mais_recentes(df: pd.DataFrame, chaves: list, exportacao: pd.Series) -> pd.DataFrame:
+    """
+    Para cada chave, mantém só as linhas da exportação mais recente que a contém.
+    Linhas repetidas dentro de uma mesma exportação são preservadas.
+    Args:
+        df (pd.DataFrame): Linhas de todas as exportações.
+        chaves (list): Séries (alinhadas a `df`) que formam a chave.
+        exportacao (pd.Series): Posição da exportação de cada linha, da mais antiga para a mais recente.
+    """
+    ultima = exportacao.groupby(chaves, dropna=False, observed=True).transform('max')
+    return df[exportacao.values == ultima.values]
+
+def _chaves_corretivas(bruto: pd.DataFrame) -> list:
+    """Chave de uma OS na exportação."""
+    return [numero_os(bruto['Nº OS'])]
+
+def _chaves_tecnicos(bruto: pd.DataFrame) -> list:
+    """Chave de um atendimento na exportação: o técnico numa OS (ou checklist), a partir de um horário."""
+    return [bruto['TIPO'], numero_os(bruto['ID']), bruto['TECNICO'], bruto['DATA INICIO'], bruto['HORA INICIO']]
+
+def _consolidar(exportacoes: tuple, arquivos: list, chaves: Callable) -> pd.DataFrame:
+    leituras = {arquivo: df.attrs.get('leitura') for arquivo, df in zip(arquivos, exportacoes)}
+    if len(exportacoes) == 1:
+        df = exportacoes[0].copy(deep=False)
+    else:
+        ordem = ordem_exportacoes([(leitura or {}).get('emissao') for leitura in leituras.values()])
+        df = pd.concat([exportacoes[i] for i in ordem], ignore_index=True)
+        exportacao = pd.Series(np.repeat(np.arange(len(ordem)), [len(exportacoes[i]) for i in ordem]))
+        df = manter_mais_recentes(df, chaves(df), exportacao).reset_index(drop=True)
+    df.attrs['leitura'] = leituras
+    return df
+
+def consolidar_corretivas(*exportacoes: pd.DataFrame, arquivos: list) -> pd.DataFrame:
+    """Une as exportações de OS corretivas; uma OS presente em várias fica com a da mais recente."""
+    return _consolidar(exportacoes, arquivos, _chaves_corretivas)
+
+def consolidar_tecnicos(*exportacoes: pd.DataFrame, arquivos: list) -> pd.DataFrame:
+    """Une as exportações do histórico dos técnicos; um atendimento repetido fica com o da mais recente."""
+    return _consolidar(exportacoes, arquivos, _chaves_tecnicos)
+
+
+# ===============================
+# 🔁 Atualização Incremental
+# ===============================
+
+def _sem_progresso(pct: int, texto: str):
+    pass
+
+def assinatura_corretivas(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Retorna Nº OS e o hash dos campos de status e datas de cada OS da exportação."""
+    colunas = [c for c in ASSINATURA_CORRETIVAS if c in bruto.columns]
+    return pd.DataFrame({
+        'Nº OS': numero_os(bruto['Nº OS']),
+        'HASH': pd.util.hash_pandas_object(bruto[colunas], index=False).values.view('int64')
+    })
+
+def assinatura_tecnicos(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Retorna TIPO, Nº OS e o hash de cada atendimento do histórico dos técnicos."""
+    colunas = [c for c in ASSINATURA_TECNICOS if c in bruto.columns]
+    return pd.DataFrame({
+        'TIPO': bruto['TIPO'],
+        'Nº OS': numero_os(bruto['ID']),
+        'HASH': pd.util.hash_pandas_object(bruto[colunas], index=False).values.view('int64')
+    })
+
+def comparar_assinaturas(anterior: pd.DataFrame, atual: pd.DataFrame, chave: list) -> tuple:
+    """
+    Compara as assinaturas da última execução com as da exportação atual.
+    Uma chave é alterada se algum dos seus hashes entrou ou saiu; é removida se sumiu da exportação.
+    Returns:
+        tuple: (chaves novas ou alteradas, chaves removidas), ambas como DataFrame de `chave`.
+    """
+    cruzado = anterior.merge(atual, on=chave + ['HASH'], how='outer', indicator=True)
+    diferentes = cruzado.loc[cruzado['_merge'] != 'both', chave].drop_duplicates()
+    presentes = atual[chave].drop_duplicates()
+    alteradas = diferentes.merge(presentes, on=chave)
+    removidas = diferentes.merge(presentes, on=chave, how='left', indicator=True)
+    removidas = removidas.loc[removidas['_merge'] == 'left_only', chave]
+    return alteradas.reset_index(drop=True), removidas.reset_index(drop=True)
+
+def _filtrar_chaves(df: pd.DataFrame, chaves: pd.DataFrame, manter: bool = True) -> pd.DataFrame:
+    """Seleciona (ou exclui, com manter=False) as linhas de `df` cujas chaves estão em `chaves`."""
+    cols = list(chaves.columns)
+    marcado = df[cols].merge(chaves.drop_duplicates(), on=cols, how='left', indicator=True)['_merge'].values == 'both'
+    return df[marcado == manter]
+
+def upsert(base: pd.DataFrame, novos: pd.DataFrame, chaves: pd.DataFrame) -> pd.DataFrame:
+    """Substitui na base as linhas das `chaves` pelas linhas de `novos`."""
+    mantidos = _filtrar_chaves(base, chaves, manter=False)
+    if novos.empty:
+        return mantidos.reset_index(drop=True)
+    return pd.concat([mantidos, novos.reindex(columns=base.columns)], ignore_index=True)
+
+def gravar_bases(db_corretivas: pd.DataFrame, tecnicos: pd.DataFrame, pasta: Optional[Path] = None):
+    gravar_base(db_corretivas, DB_CORRETIVAS, pasta=pasta)
+    gravar_base(tecnicos, DB_TECNICOS, pasta=pasta)
+
+def _gravar_estado(assin_core: pd.DataFrame, assin_tecno: pd.DataFrame, pasta: Path):
+    assin_core.to_csv(pasta / ESTADO_CORRETIVAS, index=False, encoding='utf-8')
+    assin_tecno.to_csv(pasta / ESTADO_TECNICOS, index=False, encoding='utf-8')
+
+def _ler_estados() -> tuple:
+    estados = []
+    for nome in (ESTADO_CORRETIVAS, ESTADO_TECNICOS):
+        caminho = pasta_atual() / nome
+        estados.append(pd.read_csv(caminho, dtype={'Nº OS': 'int64'}) if caminho.exists() else None)
+    return tuple(estados)
+
+
+# ===============================
+# ⚙️ Grafo de Etapas
+# ===============================
+
+def _normalizar_corretivas(bruto: pd.DataFrame) -> pd.DataFrame:
+    return normalize_corretivas(bruto.copy())
+
+def _normalizar_tecnicos(bruto: pd.DataFrame) -> pd.DataFrame:
+    return normalize_cortecnicos(bruto.copy())
+
+def etapas_leitura() -> dict:
+    """
+    Etapas de leitura das exportações: uma por arquivo, todas independentes entre si, e a
+    consolidação dos arquivos de cada base em `ler_corretivas` e `ler_tecnicos`.
+    """
+    etapas = {}
+    for etapa, descricao, modelo, colunas, consolidar in (
+        ('ler_corretivas', "OS Corretivas", CORE_XLS, COLUNAS_CORRETIVAS, consolidar_corretivas),
+        ('ler_tecnicos', "dados dos técnicos", TECNO_XLS, COLUNAS_TECNICOS, consolidar_tecnicos),
+    ):
+        arquivos = arquivos_exportacao(modelo) or [modelo]  # sem arquivo, a leitura registra o erro
+        for arquivo in arquivos:
+            etapas[f'{etapa}:{arquivo}'] = (f"Carregando {arquivo}", load_excel, [],
+                                             {'file_name': arquivo, 'colunas': colunas}, [Path('dados') / arquivo])
+        etapas[etapa] = (f"Consolidando {descricao}", consolidar, [f'{etapa}:{a}' for a in arquivos],
+                         {'arquivos': arquivos}, [])
+    return etapas
+
+def etapas_completas() -> dict:
+    """Grafo do processamento completo: os ramos de OS e de técnicos só se juntam em `base_completa`."""
+    etapas = etapas_leitura()
+    etapas.update({
+        'normalizar_corretivas': ("Normalizando OS Corretivas", _normalizar_corretivas, ['ler_corretivas'], {}, []),
+        'normalizar_tecnicos': ("Normalizando dados dos técnicos", _normalizar_tecnicos, ['ler_tecnicos'], {}, []),
+        'base_completa': ("Agrupando base completa", db_corretivas_all,
+                          ['normalizar_corretivas', 'normalizar_tecnicos'], {}, []),
+        'base_exibicao': ("Gerando base de exibição", agrupa_db, ['base_completa'], {}, []),
+    })
+    return etapas
+
+@contextmanager
+def medir_bloco(memoria: bool = True):
+    """
+    Mede o tempo do bloco e, com `memoria`, o pico de memória alocada (via tracemalloc), em
+    {'segundos', 'pico_memoria_mb'}. O dict só é preenchido ao final do bloco.
+    O tracemalloc deixa mais lentas as etapas com muito código Python (como a leitura das planilhas).
+    """
+    medida = {'pico_memoria_mb': None}
+    ja_ativo = tracemalloc.is_tracing()
+    if memoria:
+        if ja_ativo:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        yield medida
+    finally:
+        medida['segundos'] = time.perf_counter() - inicio
+        if memoria:
+            medida['pico_memoria_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            if not ja_ativo:
+                tracemalloc.stop()
+
+@contextmanager
+def _registrar(metricas: Optional[list], etapa: str, memoria: bool = False):
+    """Mede o bloco e o acrescenta a `metricas`, se houver; o bloco informa as linhas em registro['linhas']."""
+    registro = {'etapa': etapa, 'linhas': None, 'cache': False}
+    if metricas is None:
+        yield registro
+        return
+    with medir_bloco(memoria) as medida:
+        yield registro
+    registro.update(medida)
+    metricas.append(registro)
+
+def _contar_linhas(resultado) -> Optional[int]:
+    return len(resultado) if isinstance(resultado, pd.DataFrame) else None
+
+def _rodar_etapa(funcao: Callable, args: tuple, kwargs: dict, memoria: bool = False) -> tuple:
+    """Executa uma etapa (dentro do processo do pool) e mede sua duração e, se pedido, o pico de memória."""
+    with medir_bloco(memoria) as medida:
+        resultado = funcao(*args, **kwargs)
+    return resultado, medida['segundos'], medida['pico_memoria_mb']
+
+def chaves_etapas(etapas: dict) -> dict:
+    """
+    Calcula a chave de cache de cada etapa, sem executá-las: a chave combina os arquivos lidos
+    pela etapa, a versão do código e as chaves das dependências. Assim, mudar um arquivo só
+    invalida as etapas que dependem dele.
+    """
+    chaves = {}
+    while len(chaves) < len(etapas):
+        prontas = [nome for nome, (_, _, deps, _, _) in etapas.items()
+                   if nome not in chaves and all(d in chaves for d in deps)]
+        if not prontas:
+            raise ValueError(f"Dependências inexistentes ou circulares: {sorted(set(etapas) - set(chaves))}")
+        for nome in prontas:
+            _, _, deps, kwargs, arquivos = etapas[nome]
+            chaves[nome] = chave_etapa(nome, kwargs, [chaves[d] for d in deps], arquivos)
+    return chaves
+
+def _contexto_processos() -> multiprocessing.context.BaseContext:
+    """
+    Contexto dos processos do pool de etapas. A ingestão roda numa thread do servidor do Streamlit,
+    e o 'fork' padrão do Linux copiaria o processo com as outras threads no meio de uma operação:
+    o filho pode travar num lock que uma delas segurava. Os processos saem do 'forkserver', um
+    processo sem threads que já importou o pipeline, iniciado na primeira ingestão e reaproveitado
+    nas seguintes; onde não há forkserver (Windows), do 'spawn'.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    contexto = multiprocessing.get_context('forkserver')
+    contexto.set_forkserver_preload([__name__])
+    return contexto
+
+def executar_etapas(etapas: dict, progresso: Callable = _sem_progresso, paralelo: bool = True,
+                    faixa: tuple = (5, 85), cache: bool = True, metricas: Optional[list] = None,
+                    memoria: bool = False) -> Optional[dict]:
+    """
+    Executa um grafo de etapas {nome: (descrição, função, dependências, kwargs, arquivos)}.
+    Cada etapa recebe, como argumentos posicionais, os resultados das suas dependências.
+    Etapas independentes rodam ao mesmo tempo num pool de processos (ver `_contexto_processos`),
+    e o progresso avança a cada etapa concluída. Uma etapa que retorna None interrompe o grafo.
+    Args:
+        etapas (dict): Grafo de etapas; as funções precisam ser de nível de módulo.
+        progresso (Callable): Recebe (percentual, texto), como `st.progress`.
+        paralelo (bool): False executa tudo em sequência, no próprio processo.
+        faixa (tuple): Faixa do percentual de progresso ocupada pelo grafo.
+        cache (bool): Reaproveita resultados gravados para as mesmas entradas (ver `utils.cache`).
+        metricas (list): Se informada, recebe o tempo e as linhas de cada etapa.
+        memoria (bool): Mede também o pico de memória de cada etapa (ver `medir_bloco`).
+    Returns:
+        dict: {nome: resultado} de todas as etapas, ou None se alguma falhou.
+    """
+    chaves = chaves_etapas(etapas)
+    pendentes = dict(etapas)
+    resultados, em_execucao = {}, {}
+    pct_inicial, pct_final = faixa
+    executor = ProcessPoolExecutor(max_workers=min(len(etapas), os.cpu_count() or 1),
+                                   mp_context=_contexto_processos()) if paralelo else None
+    try:
+        while pendentes or em_execucao:
+            prontas = [nome for nome, (_, _, deps, _, _) in pendentes.items() if all(d in resultados for d in deps)]
+            concluidas = []
+            for nome in prontas:
+                _, funcao, deps, kwargs, _ = pendentes.pop(nome)
+                gravado = ler_cache(chaves[nome]) if cache else AUSENTE
+                if gravado is not AUSENTE:
+                    concluidas.append((nome, (gravado, None, None)))
+                    continue
+                args = tuple(resultados[d] for d in deps)
+                medir_memoria = memoria and metricas is not None
+                if executor is None:
+                    em_execucao[nome] = _rodar_etapa(funcao, args, kwargs, medir_memoria)
+                else:
+                    em_execucao[executor.submit(_rodar_etapa, funcao, args, kwargs, medir_memoria)] = nome
+
+            if executor is None:
+                concluidas += [(nome, em_execucao.pop(nome)) for nome in list(em_execucao)]
+            elif em_execucao and not concluidas:
+                feitas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                concluidas += [(em_execucao.pop(futuro), futuro.result()) for futuro in feitas]
+
+            for nome, (resultado, duracao, pico) in concluidas:
+                descricao = etapas[nome][0]
+                if resultado is None:
+                    progresso(pct_inicial, f"Falha na etapa: {descricao}")
+                    return None
+                resultados[nome] = resultado
+                if metricas is not None:
+                    metricas.append({'etapa': nome, 'linhas': _contar_linhas(resultado), 'cache': duracao is None,
+                                     'segundos': duracao, 'pico_memoria_mb': pico})
+                if cache and duracao is not None:
+                    gravar_cache(chaves[nome], resultado)
+                pct = pct_inicial + (pct_final - pct_inicial) * len(resultados) // len(etapas)
+                progresso(pct, f"{descricao} ({'cache' if duracao is None else f'{duracao:.1f}s'})")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return resultados
+
+
+# ===============================
+# 📦 Ingestão em Lotes
+# ===============================
+
+# As OS são espalhadas em pelo menos tantos baldes, reunidos em grupos de ~`lote` OS ao agrupar
+BALDES_MINIMOS = 256
+
+def _espalhar(df: pd.DataFrame, baldes: int, pasta: Path) -> np.ndarray:
+    """
+    Acrescenta as linhas de `df` aos arquivos de balde de `pasta`, escolhidos pelo hash do Nº OS.
+    Returns:
+        np.ndarray: Linhas acrescentadas a cada balde.
+    """
+    balde = pd.util.hash_pandas_object(df['Nº OS'], index=False).values % baldes
+    for numero, parte in df.groupby(balde, sort=False):
+        with open(pasta / f'{numero:05d}.pkl', 'ab') as arquivo:
+            pickle.dump(parte, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    return np.bincount(balde, minlength=baldes)
+
+def _ler_baldes(pasta: Path, baldes: list) -> Optional[pd.DataFrame]:
+    """Linhas dos baldes, cada um na ordem em que foi escrito, ou None se estiverem todos vazios."""
+    partes = []
+    for numero in baldes:
+        caminho = pasta / f'{numero:05d}.pkl'
+        if not caminho.exists():
+            continue
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                try:
+                    partes.append(pickle.load(arquivo))
+                except EOFError:
+                    break
+    return pd.concat(partes, ignore_index=True) if partes else None
+
+def _grupos_de_baldes(linhas: np.ndarray, lote: int) -> Iterator[list]:
+    """Reúne baldes vizinhos (não vazios) em grupos de pelo menos `lote` linhas, salvo o último."""
+    grupo, total = [], 0
+    for numero in np.flatnonzero(linhas):
+        grupo.append(numero)
+        total += linhas[numero]
+        if total >= lote:
+            yield grupo
+            grupo, total = [], 0
+    if grupo:
+        yield grupo
+
+def _acrescentar_csv(df: pd.DataFrame, caminho: Path):
+    df.to_csv(caminho, mode='a', header=not caminho.exists(), index=False, encoding='utf-8')
+
+def _exportacoes_em_lotes(modelo: str, colunas: list, lote: int, leituras: dict) -> Iterator[tuple]:
+    """
+    Lotes de todas as exportações de uma base, da mais antiga para a mais recente, como
+    (posição da exportação, lote). O resumo da leitura de cada arquivo vai para `leituras`.
+    """
+    arquivos = arquivos_exportacao(modelo) or [modelo]
+    ordem = ordem_exportacoes([emissao_exportacao(arquivo) for arquivo in arquivos])
+    for posicao, indice in enumerate(ordem):
+        leitura = leituras.setdefault(arquivos[indice], {})
+        for bruto in ler_excel_em_lotes(arquivos[indice], colunas, lote, leitura):
+            yield posicao, bruto
+        if 'erro' in leitura:
+            return
+
+def gerar_bases_em_lotes(destino: Path, lote: int, progresso: Callable = _sem_progresso,
+                         metricas: Optional[list] = None, memoria: bool = False) -> Optional[dict]:
+    """
+    Processamento completo com memória limitada, para exportações grandes demais para a memória.
+    As exportações são lidas e normalizadas em lotes de `lote` linhas, e cada lote vai para baldes
+    temporários, pelo hash do Nº OS. Depois, os baldes são processados em grupos de cerca de
+    `lote` linhas, que trazem todas as linhas das suas OS, de todas as exportações: as repetidas
+    são descartadas (a exportação mais recente vence, como em `consolidar_corretivas`), os
+    atendimentos são acrescentados a DBTecno_All e as OS são juntadas aos seus atendimentos e
+    agrupadas como no modo completo, e acrescentadas a DBCorretivas. O estado e o cubo de
+    indicadores também são gravados ou somados por grupo.
+    Há ao menos `BALDES_MINIMOS` baldes, ou um para cada `lote` OS estimadas pela dimensão da
+    planilha, de modo que a memória usada depende do tamanho do lote, e não do da exportação.
+    Returns:
+        dict: Resumo da execução, ou None se alguma exportação não pôde ser lida.
+    """
+    temporaria = destino / '.lotes'
+    baldes_core, baldes_tecno = temporaria / 'corretivas', temporaria / 'tecnicos'
+    baldes_core.mkdir(parents=True)
+    baldes_tecno.mkdir()
+    leitura_core, leitura_tecno = {}, {}
+    baldes = BALDES_MINIMOS
+    linhas_baldes = np.zeros(baldes, dtype=int)
+    try:
+        progresso(5, "Normalizando OS Corretivas em lotes...")
+        with _registrar(metricas, 'lotes_corretivas', memoria) as registro:
+            for parte, (exportacao, bruto) in enumerate(
+                    _exportacoes_em_lotes(CORE_XLS, COLUNAS_CORRETIVAS, lote, leitura_core)):
+                if parte == 0:
+                    arquivos = max(len(arquivos_exportacao(CORE_XLS)), 1)
+                    estimadas = next(iter(leitura_core.values()))['linhas_estimadas'] * arquivos
+                    baldes = max(BALDES_MINIMOS, math.ceil(estimadas / lote))
+                    linhas_baldes = np.zeros(baldes, dtype=int)
+                assinatura = assinatura_corretivas(bruto)['HASH'].values
+                corretivas = normalize_corretivas(bruto)
+                corretivas['_EXPORTACAO'], corretivas['_HASH'] = exportacao, assinatura
+                linhas_baldes += _espalhar(corretivas, baldes, baldes_core)
+            registro['linhas'] = sum(leitura.get('linhas', 0) for leitura in leitura_core.values())
+        if any('erro' in leitura for leitura in leitura_core.values()):
+            return None
+
+        progresso(35, "Normalizando dados dos técnicos em lotes...")
+        with _registrar(metricas, 'lotes_tecnicos', memoria) as registro:
+            for exportacao, bruto in _exportacoes_em_lotes(TECNO_XLS, COLUNAS_TECNICOS, lote, leitura_tecno):
+                chave = pd.util.hash_pandas_object(pd.concat(_chaves_tecnicos(bruto), axis=1), index=False).values
+                assinatura = assinatura_tecnicos(bruto)['HASH'].values
+                tecnicos = normalize_cortecnicos(bruto)
+                tecnicos['_EXPORTACAO'], tecnicos['_HASH'], tecnicos['_CHAVE'] = exportacao, assinatura, chave
+                linhas_baldes += _espalhar(tecnicos, baldes, baldes_tecno)
+            registro['linhas'] = sum(leitura.get('linhas', 0) for leitura in leitura_tecno.values())
+        if any('erro' in leitura for leitura in leitura_tecno.values()):
+            return None
+
+        progresso(65, "Agrupando bases por lotes...")
+        with _registrar(metricas, 'juntar_lotes', memoria) as registro:
+            total_core = total_tecno = 0
+            cubo = None
+            for parte, grupo in enumerate(_grupos_de_baldes(linhas_baldes, lote)):
+                tecnicos = _ler_baldes(baldes_tecno, grupo)
+                if tecnicos is None:
+                    tecnicos = pd.DataFrame(columns=COLUNAS_DB_TECNICOS)
+                else:
+                    tecnicos = manter_mais_recentes(tecnicos, [tecnicos['_CHAVE']], tecnicos['_EXPORTACAO'])
+                    _acrescentar_csv(pd.DataFrame({'TIPO': tecnicos['TIPO'], 'Nº OS': tecnicos['Nº OS'],
+                                                   'HASH': tecnicos['_HASH']}), destino / ESTADO_TECNICOS)
+                    acrescentar_base(tecnicos[COLUNAS_DB_TECNICOS], DB_TECNICOS, destino, parte)
+                    total_tecno += len(tecnicos)
+
+                corretivas = _ler_baldes(baldes_core, grupo)
+                if corretivas is None:
+                    continue
+                corretivas = manter_mais_recentes(corretivas, [corretivas['Nº OS']], corretivas['_EXPORTACAO'])
+                _acrescentar_csv(pd.DataFrame({'Nº OS': corretivas['Nº OS'], 'HASH': corretivas['_HASH']}),
+                                 destino / ESTADO_CORRETIVAS)
+                db_corretivas = agrupa_db(db_corretivas_all(corretivas, tecnicos))
+                acrescentar_base(db_corretivas, DB_CORRETIVAS, destino, parte)
+                total_core += len(db_corretivas)
+                cubo_grupo = cubo_indicadores(db_corretivas)
+                cubo = cubo_grupo if cubo is None else somar_cubos(cubo, cubo_grupo)
+            registro['linhas'] = total_core + total_tecno
+    finally:
+        shutil.rmtree(temporaria, ignore_errors=True)
+
+    if cubo is not None:
+        with _registrar(metricas, 'indicadores', memoria) as registro:
+            registro['linhas'] = gravar_cubo(cubo, destino)
+
+    leitura = {**leitura_core, **leitura_tecno}
+    for resumo_leitura in leitura.values():
+        resumo_leitura.pop('linhas_estimadas', None)
+    return {'modo': 'completo em lotes', 'os_atualizadas': total_core,
+            'atendimentos_atualizados': total_tecno, 'leitura': leitura}
+
+
+# ===============================
+# 🚀 Execução do Pipeline
+# ===============================
+
+def gerar_bases_incrementais(bruto_core: pd.DataFrame, bruto_tecno: pd.DataFrame,
+                             estado_core: pd.DataFrame, estado_tecno: pd.DataFrame,
+                             destino: Path, progresso: Callable = _sem_progresso,
+                             metricas: Optional[list] = None, memoria: bool = False) -> dict:
+    """Renormaliza apenas as OS novas ou alteradas desde a última execução e grava as bases
+    atualizadas no snapshot `destino`. O cubo de indicadores é atualizado a partir do snapshot
+    atual, trocando a contribuição das versões anteriores das OS pela das novas."""
+    with _registrar(metricas, 'ler_bases', memoria) as registro:
+        db_corretivas = ler_base(DB_CORRETIVAS)
+        tecnicos = ler_base(DB_TECNICOS)
+        registro['linhas'] = len(db_corretivas) + len(tecnicos)
+
+    progresso(45, "Identificando OS novas ou alteradas...")
+    with _registrar(metricas, 'comparar_assinaturas', memoria) as registro:
+        core_alteradas, core_removidas = comparar_assinaturas(estado_core, assinatura_corretivas(bruto_core), ['Nº OS'])
+        tec_alterados, tec_removidos = comparar_assinaturas(estado_tecno, assinatura_tecnicos(bruto_tecno), ['TIPO', 'Nº OS'])
+        registro['linhas'] = len(core_alteradas) + len(core_removidas) + len(tec_alterados) + len(tec_removidos)
+
+    progresso(55, "Normalizando atendimentos alterados...")
+    with _registrar(metricas, 'atualizar_tecnicos', memoria) as registro:
+        chave_tecno = pd.DataFrame({
+            'TIPO': bruto_tecno['TIPO'],
+            'Nº OS': numero_os(bruto_tecno['ID'])
+        })
+        marcados = _filtrar_chaves(chave_tecno, tec_alterados).index
+        tec_delta = normalize_cortecnicos(bruto_tecno.loc[marcados].copy())
+        tecnicos = upsert(tecnicos, tec_delta, pd.concat([tec_alterados, tec_removidos]))
+        tecnicos = tecnicos.sort_values('Início', kind='stable', na_position='last').reset_index(drop=True)
+        registro['linhas'] = len(tec_delta)
+
+    progresso(65, "Normalizando OS alteradas...")
+    with _registrar(metricas, 'normalizar_corretivas', memoria) as registro:
+        # OS corretivas cujos atendimentos mudaram também precisam ser reagrupadas
+        os_tecno = tec_alterados.loc[tec_alterados['TIPO'] == 'OS Corretiva', ['Nº OS']]
+        os_tecno = pd.concat([os_tecno, tec_removidos.loc[tec_removidos['TIPO'] == 'OS Corretiva', ['Nº OS']]])
+        afetadas = pd.concat([core_alteradas, os_tecno]).drop_duplicates()
+        bruto_afetado = bruto_core[numero_os(bruto_core['Nº OS']).isin(afetadas['Nº OS'])]
+        corretivas = normalize_corretivas(bruto_afetado.copy())
+        registro['linhas'] = len(corretivas)
+
+    progresso(75, "Atualizando base de exibição...")
+    with _registrar(metricas, 'base_exibicao', memoria) as registro:
+        db_delta = agrupa_db(db_corretivas_all(corretivas, tecnicos))
+        substituidas = pd.concat([afetadas, core_removidas])
+        db_anteriores = _filtrar_chaves(db_corretivas, substituidas)
+        db_corretivas = upsert(db_corretivas, db_delta, substituidas)
+        db_corretivas = db_corretivas.sort_values('Nº OS', kind='stable').reset_index(drop=True)
+        registro['linhas'] = len(db_delta)
+
+    progresso(85, "Salvando bases...")
+    with _registrar(metricas, 'gravar_bases', memoria) as registro:
+        gravar_bases(db_corretivas, tecnicos, destino)
+        registro['linhas'] = len(db_corretivas) + len(tecnicos)
+
+    # Cubo: só as células dos meses de abertura e de término das OS substituídas mudam
+    with _registrar(metricas, 'indicadores', memoria) as registro:
+        cubo = ler_cubo()
+        if cubo is None:
+            cubo = cubo_indicadores(db_corretivas)
+        else:
+            cubo = atualizar_cubo(cubo, db_anteriores, db_delta)
+        registro['linhas'] = gravar_cubo(cubo, destino)
+    return {'modo': 'incremental', 'os_atualizadas': len(db_delta), 'atendimentos_atualizados': len(tec_delta)}
+
+def _esquema_atual() -> bool:
+    """Indica se as bases gravadas já têm todas as colunas do esquema atual, com o Nº OS inteiro."""
+    for nome, colunas in ((DB_CORRETIVAS, COLUNAS_DB_CORRETIVAS), (DB_TECNICOS, COLUNAS_DB_TECNICOS)):
+        tipos = tipos_base(nome)
+        if not set(colunas) <= set(tipos) or tipos['Nº OS'] != 'int64':
+            return False
+    return True
+
+def processar_bases(incremental: bool = True, progresso: Callable = _sem_progresso,
+                    paralelo: bool = True, cache: bool = True, forcar: bool = False,
+                    medir: bool = False, memoria: bool = True, lote: Optional[int] = None) -> Optional[dict]:
+    """
+    Executa o pipeline de leitura, normalização e exportação das bases.
+    No modo incremental, só as OS novas ou alteradas desde a última execução são reprocessadas;
+    sem estado ou bases anteriores, cai no processamento completo.
+    As bases, o cubo de indicadores do dashboard e o estado são gravados em um snapshot novo, publicado
+    só se a execução terminar; até lá, os leitores continuam no snapshot anterior.
+    Args:
+        incremental (bool): Usa o estado da última execução para processar apenas o delta.
+        progresso (Callable): Recebe (percentual, texto) a cada etapa, como `st.progress`.
+        paralelo (bool): Executa as etapas independentes em paralelo, num pool de processos.
+        cache (bool): Reaproveita as etapas já calculadas para as mesmas entradas.
+        forcar (bool): Processa mesmo que as exportações não tenham mudado desde a última execução.
+        medir (bool): Inclui no resumo, em 'etapas', o tempo, as linhas e o pico de memória de cada etapa.
+        memoria (bool): Com `medir`, mede também o pico de memória (via tracemalloc, mais lento).
+        lote (int): Refaz as bases por completo, lendo e processando as exportações em lotes
+            desse número de linhas (ver `gerar_bases_em_lotes`); ignora `incremental` e `cache`.
+    Returns:
+        dict: Resumo da execução, ou None se alguma exportação não pôde ser lida.
+    """
+    estado_core, estado_tecno = _ler_estados()
+    bases_gravadas = (estado_core is not None and estado_tecno is not None
+                      and existe_base(DB_CORRETIVAS) and existe_base(DB_TECNICOS) and _esquema_atual())
+    incremental = incremental and bases_gravadas
+
+    # Exportações e código idênticos aos da última execução: as bases gravadas já estão atualizadas
+    chave_entradas = ' '.join(chaves_etapas(etapas_leitura()).values())
+    estado_entradas = pasta_atual() / ESTADO_ENTRADAS
+    if (not forcar and bases_gravadas and estado_entradas.exists()
+            and estado_entradas.read_text() == chave_entradas):
+        return {'modo': 'sem alterações', 'os_atualizadas': 0, 'atendimentos_atualizados': 0,
+                'leitura': {}, 'etapas': []}
+
+    metricas = [] if medir else None
+    destino = criar_snapshot()
+    try:
+        if lote:
+            resumo = gerar_bases_em_lotes(destino, lote, progresso, metricas, memoria)
+        else:
+            resumo = _gerar_snapshot(destino, incremental, estado_core, estado_tecno, progresso, paralelo,
+                                     cache, metricas, memoria)
+    except BaseException:
+        descartar_snapshot(destino)
+        raise
+    if resumo is None:
+        descartar_snapshot(destino)
+        return None
+
+    (destino / ESTADO_ENTRADAS).write_text(chave_entradas)
+    publicar_snapshot(destino)
+    resumo['snapshot'] = destino.name
+    if metricas is not None:
+        resumo['etapas'] = metricas
+    return resumo
+
+def _gerar_snapshot(destino: Path, incremental: bool, estado_core: Optional[pd.DataFrame],
+                    estado_tecno: Optional[pd.DataFrame], progresso: Callable, paralelo: bool,
+                    cache: bool, metricas: Optional[list], memoria: bool) -> Optional[dict]:
+    progresso(5, "Carregando exportações do Optimus...")
+    etapas = etapas_leitura() if incremental else etapas_completas()
+    resultados = executar_etapas(etapas, progresso, paralelo, faixa=(5, 40 if incremental else 85),
+                                 cache=cache, metricas=metricas, memoria=memoria)
+    if resultados is None:
+        return None
+    bruto_core, bruto_tecno = resultados['ler_corretivas'], resultados['ler_tecnicos']
+
+    if incremental:
+        resumo = gerar_bases_incrementais(bruto_core, bruto_tecno, estado_core, estado_tecno, destino,
+                                          progresso, metricas, memoria)
+    else:
+        progresso(85, "Salvando bases...")
+        db_corretivas, tecnicos = resultados['base_exibicao'], resultados['normalizar_tecnicos']
+        with _registrar(metricas, 'gravar_bases', memoria) as registro:
+            gravar_bases(db_corretivas, tecnicos, destino)
+            registro['linhas'] = len(db_corretivas) + len(tecnicos)
+        with _registrar(metricas, 'indicadores', memoria) as registro:
+            registro['linhas'] = gravar_cubo(cubo_indicadores(db_corretivas), destino)
+        resumo = {'modo': 'completo', 'os_atualizadas': len(db_corretivas), 'atendimentos_atualizados': len(tecnicos)}
+
+    progresso(95, "Salvando estado da ingestão...")
+    with _registrar(metricas, 'gravar_estado', memoria) as registro:
+        _gravar_estado(assinatura_corretivas(bruto_core), assinatura_tecnicos(bruto_tecno), destino)
+        registro['linhas'] = len(bruto_core) + len(bruto_tecno)
+    resumo['leitura'] = {**bruto_core.attrs.get('leitura', {}), **bruto_tecno.attrs.get('leitura', {})}
+    return resumo
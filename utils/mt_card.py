@@ -2,80 +2,26 @@ import streamlit as st
 from streamlit.components.v1 import html
 from utils.tools import format_brazilian_number
 
-def mt_card(
-    title,
-    current_value,
-    previous_value,
-    stripe_color="#FFA500",
-    height=130,  # Altura fixa em 120px
-    icon_name="insights",
-    history=None,
-    bar_color="#8884d8",
-    theme="light",
-    hover_color="#F5F5F5"
-):
-    # Configuração de cores baseada no tema
-    if history==None:
-        height = 90  # Altura reduzida se não houver histórico
-    else:
-        height = 115
-    
-    bg_color = "#1E1E1E" if theme == "dark" else "#FFFFFF"
-    text_color = "#FFFFFF" if theme == "dark" else "#000000"
-    subtext_color = "#AAAAAA" if theme == "dark" else "#555555"
-    border_color = "#333333" if theme == "dark" else "#E0E0E0"
-    
-    # Formatando os valores
-    formatted_current = format_brazilian_number(current_value)
-    formatted_previous = format_brazilian_number(previous_value)
-    
-    # Cálculos de variação
-    delta = current_value - previous_value
-    delta_pct = (delta / previous_value * 100) if previous_value != 0 else 0
-    delta_icon = "arrow_upward" if delta >= 0 else "arrow_downward"
-    delta_clr = "#4CAF50" if delta >= 0 else "#F44336"
-    formatted_delta = format_brazilian_number(abs(delta))
-    
-    # Gráfico com largura máxima e design aprimorado
-    bar_svg = ""
-    chart_height = 28  # Altura padrão do gráfico
-    chart_wrapper_style = "min-height: 0px;"  # Estilo padrão sem gráfico
-    
-    if history and len(history) > 0:
-        max_val = max(history) or 1
-        total_bars = len(history)
-        bar_width = 16  # Barras mais largas
-        bar_spacing = 4  # Espaçamento equilibrado
-        total_width = total_bars * (bar_width + bar_spacing)
-        
-        bar_svg = f'''
-        <div style="margin-top: 2px; width: 100%; overflow: hidden;">
-            <svg width="{total_width}px" height="{chart_height}" viewBox="0 0 {total_width} {chart_height}">
-        '''
-        for i, val in enumerate(history):
-            bar_height = (val / max_val) * (chart_height - 2)
-            x_pos = i * (bar_width + bar_spacing)
-            y_pos = chart_height - bar_height
-            bar_svg += f'''
-            <rect x="{x_pos}" y="{y_pos}" 
-                  width="{bar_width}" height="{bar_height}" 
-                  fill="{bar_color}" rx="3"
-                  style="transition: all 0.3s ease;">          
-                <title>Valor: {format_brazilian_number(val)}</title>
-            </rect>
-            '''
-        bar_svg += '</svg></div>'
-        chart_wrapper_style = f"min-height: {chart_height}px;"  # Ajusta altura quando há gráfico
-    
-    # HTML com layout ultra-otimizado
-    html_content = f"""
+# Espaço vertical entre as linhas da grade (margem de 6px acima e abaixo de cada cartão)
+ESPACO_LINHAS = 12
+
+# CSS e ícones compartilhados por todos os cartões do documento; as cores de cada cartão
+# (tema, tarja, variação) vêm de variáveis CSS no próprio cartão
+CSS_CARTOES = """
     <link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">
     <style>
-        .metric-card {{
+        body {
+            margin: 0;
+            padding: 2px 8px 0;
+        }
+        .metric-grid {
+            display: grid;
+            column-gap: 12px;
+        }
+        .metric-card {
             position: relative;
-            height: {height}px;
-            background: {bg_color};
-            border: 1px solid {border_color};
+            background: var(--bg);
+            border: 1px solid var(--border);
             border-radius: 8px;
             margin: 6px 0;
             padding-left: 8px;
@@ -83,84 +29,179 @@ def mt_card(
             font-family: 'Segoe UI', Roboto, sans-serif;
             box-sizing: border-box;
             overflow: hidden;
-        }}
-        .metric-card:hover {{
-            background: {hover_color};
+        }
+        .metric-card:hover {
+            background: var(--hover);
             cursor: pointer;
             transform: translateY(-5px);
             box-shadow: 3px 3px 20px rgba(0,0,0,0.2); /* Aumentando a sombra */
-        }}
-        .stripe {{
+        }
+        .stripe {
             position: absolute;
             left: 0;
             top: 0;
             bottom: 0;
             width: 8px;
             height: 100%;
-            background: {stripe_color};
+            background: var(--stripe);
             border-radius: 8px 0 0 8px;
-        }}
-        .card-content {{
+        }
+        .card-content {
             height: 100%;
             padding: 8px 10px 8px 0px;
             position: relative;
             display: flex;
             flex-direction: column;
-            justify-content: space-between;            
+            justify-content: space-between;
             box-sizing: border-box;
-        }}
-        .metric-title {{
-            color: {subtext_color};
+        }
+        .metric-icon {
+            position: absolute;
+            right: 6px;
+            color: var(--subtext);
+        }
+        .metric-title {
+            color: var(--subtext);
             font-size: 14px;
             font-weight: 500;
-             white-space: nowrap;
-        }}
-        .metric-value {{
-            color: {text_color};
+            white-space: nowrap;
+        }
+        .metric-value {
+            color: var(--text);
             font-size: 22px;
             font-weight: 700;
             letter-spacing: -0.5px;
-        }}
-        .delta-container {{
+        }
+        .delta-container {
             display: flex;
             align-items: center;
             gap: 4px;
             margin: 3px 0;
-        }}
-        .delta-value {{
-            color: {delta_clr};
+            color: var(--delta);
+        }
+        .delta-value {
             font-size: 12px;
             font-weight: 500;
-        }}
-        .chart-wrapper {{
+        }
+        .chart-wrapper {
             flex-grow: 1;
-            {chart_wrapper_style}
             width: 100%;
             overflow: hidden;
-        }}
-        .material-icons {{
+        }
+        .material-icons {
             font-size: 20px !important;
             vertical-align: middle;
-        }}
+        }
     </style>
-    
-    <div class="metric-card">
+"""
+
+def _barras_svg(history, bar_color, chart_height):
+    """Mini gráfico de barras do histórico, em SVG."""
+    max_val = max(history) or 1
+    bar_width = 16  # Barras mais largas
+    bar_spacing = 4  # Espaçamento equilibrado
+    total_width = len(history) * (bar_width + bar_spacing)
+    barras = [
+        f'<rect x="{i * (bar_width + bar_spacing)}" y="{chart_height - (val / max_val) * (chart_height - 2)}" '
+        f'width="{bar_width}" height="{(val / max_val) * (chart_height - 2)}" fill="{bar_color}" rx="3" '
+        f'style="transition: all 0.3s ease;"><title>Valor: {format_brazilian_number(val)}</title></rect>'
+        for i, val in enumerate(history)
+    ]
+    return (f'<div style="margin-top: 2px; width: 100%; overflow: hidden;">'
+            f'<svg width="{total_width}px" height="{chart_height}" viewBox="0 0 {total_width} {chart_height}">'
+            f'{"".join(barras)}</svg></div>')
+
+def _html_card(
+    title,
+    current_value,
+    previous_value,
+    stripe_color="#FFA500",
+    height=130,
+    icon_name="insights",
+    history=None,
+    bar_color="#8884d8",
+    theme="light",
+    hover_color="#F5F5F5"
+):
+    """HTML de um cartão (sem o CSS compartilhado) e a sua altura em px."""
+    # Altura reduzida se não houver histórico
+    height = 90 if history is None else 115
+
+    # Configuração de cores baseada no tema
+    bg_color = "#1E1E1E" if theme == "dark" else "#FFFFFF"
+    text_color = "#FFFFFF" if theme == "dark" else "#000000"
+    subtext_color = "#AAAAAA" if theme == "dark" else "#555555"
+    border_color = "#333333" if theme == "dark" else "#E0E0E0"
+
+    # Cálculos de variação
+    delta = current_value - previous_value
+    delta_pct = (delta / previous_value * 100) if previous_value != 0 else 0
+    delta_icon = "arrow_upward" if delta >= 0 else "arrow_downward"
+    delta_clr = "#4CAF50" if delta >= 0 else "#F44336"
+
+    chart_height = 28  # Altura padrão do gráfico
+    bar_svg = _barras_svg(history, bar_color, chart_height) if history else ""
+    chart_min_height = chart_height if history else 0
+
+    variaveis = (f"--bg: {bg_color}; --hover: {hover_color}; --border: {border_color}; --stripe: {stripe_color}; "
+                 f"--text: {text_color}; --subtext: {subtext_color}; --delta: {delta_clr}; height: {height}px;")
+    card = f"""
+    <div class="metric-card" style="{variaveis}">
         <div class="stripe"></div>
         <div class="card-content">
-            <div style="position: absolute; right: 6px; color: {subtext_color};">
-                <i class="material-icons">{icon_name}</i>
-            </div>
+            <div class="metric-icon"><i class="material-icons">{icon_name}</i></div>
             <div class="metric-title">{title}</div>
-            <div class="metric-value">{formatted_current}</div>
+            <div class="metric-value">{format_brazilian_number(current_value)}</div>
             <div class="delta-container">
-                <i class="material-icons" style="color: {delta_clr}">{delta_icon}</i>
-                <span class="delta-value">{formatted_delta} ({delta_pct:+.1f}%)</span>
+                <i class="material-icons">{delta_icon}</i>
+                <span class="delta-value">{format_brazilian_number(abs(delta))} ({delta_pct:+.1f}%)</span>
             </div>
-            <div class="chart-wrapper">
+            <div class="chart-wrapper" style="min-height: {chart_min_height}px;">
                 {bar_svg}
             </div>
         </div>
     </div>
     """
-    
-    html(html_content, height=height+10)
\ No newline at end of file
+    return card, height
+
+# O HTML depende só dos argumentos: cada combinação de cartões é montada uma vez e
+# compartilhada entre as reexecuções e as sessões
+@st.cache_data(show_spinner=False, max_entries=256)
+def _html_grade(cards, columns):
+    """Documento com todos os cartões (CSS e ícones uma vez só) e a altura do iframe."""
+    cartoes = [_html_card(**card) for card in cards]
+    # A linha da grade tem a altura do seu cartão mais alto
+    linhas = [max(altura for _, altura in cartoes[i:i + columns]) for i in range(0, len(cartoes), columns)]
+    altura = sum(linhas) + ESPACO_LINHAS * (len(linhas) - 1) + 10
+    documento = (f'{CSS_CARTOES}<div class="metric-grid" style="grid-template-columns: repeat({columns}, minmax(0, 1fr));">'
+                 f'{"".join(card for card, _ in cartoes)}</div>')
+    return documento, altura
+
+def mt_card_grid(cards, columns=3):
+    """
+    Grade de cartões de métricas em um único iframe, com `columns` cartões por linha.
+    Cada item de `cards` é um dict com os argumentos de `mt_card` (title, current_value,
+    previous_value e os opcionais, como history e theme).
+    """
+    if not cards:
+        return
+    documento, altura = _html_grade(list(cards), max(1, min(columns, len(cards))))
+    html(documento, height=altura)
+
+def mt_card(
+    title,
+    current_value,
+    previous_value,
+    stripe_color="#FFA500",
+    height=130,  # Altura fixa em 120px
+    icon_name="insights",
+    history=None,
+    bar_color="#8884d8",
+    theme="light",
+    hover_color="#F5F5F5"
+):
+    mt_card_grid([dict(
+        title=title, current_value=current_value, previous_value=previous_value, stripe_color=stripe_color,
+        height=height, icon_name=icon_name, history=history, bar_color=bar_color, theme=theme,
+        hover_color=hover_color
+    )], columns=1)
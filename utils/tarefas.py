@@ -0,0 +1,87 @@
+"""
+tarefas.py
+
+Execução da ingestão em segundo plano, fora da thread do script do Streamlit:
+- `iniciar_ingestao`
+- `estado_tarefa`
+- `tarefa_em_andamento`
+
+As tarefas ficam num registro do processo do servidor, compartilhado por todas as sessões.
+Cada uma tem um id e pode ser consultada a qualquer momento para acompanhar o progresso.
+"""
+
+import threading
+import traceback
+import uuid
+from datetime import datetime
+from typing import Optional
+from utils.ingestao import processar_bases
+
+_TAREFAS = {}
+_TRAVA = threading.Lock()
+
+
+def iniciar_ingestao(incremental: bool = True, forcar: bool = False) -> str:
+    """
+    Inicia a ingestão em uma thread e retorna o id da tarefa.
+    Se já houver uma ingestão em andamento, retorna o id dela em vez de iniciar outra.
+    Com `forcar`, processa mesmo que as exportações não tenham mudado (ver `processar_bases`).
+    """
+    with _TRAVA:
+        atual = _em_andamento()
+        if atual:
+            return atual
+        id_tarefa = uuid.uuid4().hex[:8]
+        _TAREFAS[id_tarefa] = {
+            'id': id_tarefa,
+            'estado': 'executando',
+            'percentual': 0,
+            'texto': 'Iniciando...',
+            'incremental': incremental,
+            'forcar': forcar,
+            'inicio': datetime.now(),
+            'fim': None,
+            'resumo': None,
+            'erro': None,
+            'detalhes': None,
+        }
+
+    threading.Thread(target=_executar, args=(id_tarefa, incremental, forcar), name=f'ingestao-{id_tarefa}',
+                     daemon=True).start()
+    return id_tarefa
+
+def estado_tarefa(id_tarefa: str) -> Optional[dict]:
+    """Cópia do estado da tarefa (estado, percentual, texto, resumo, erro...), ou None se não existir."""
+    with _TRAVA:
+        tarefa = _TAREFAS.get(id_tarefa)
+        return dict(tarefa) if tarefa else None
+
+def tarefa_em_andamento() -> Optional[str]:
+    """Id da ingestão em andamento, se houver."""
+    with _TRAVA:
+        return _em_andamento()
+
+def _em_andamento() -> Optional[str]:
+    return next((t['id'] for t in _TAREFAS.values() if t['estado'] == 'executando'), None)
+
+def _atualizar(id_tarefa: str, **campos):
+    with _TRAVA:
+        _TAREFAS[id_tarefa].update(campos)
+
+def _executar(id_tarefa: str, incremental: bool, forcar: bool):
+    def progresso(percentual: int, texto: str):
+        _atualizar(id_tarefa, percentual=percentual, texto=texto)
+
+    try:
+        resumo = processar_bases(incremental=incremental, progresso=progresso, forcar=forcar)
+    except Exception as exc:
+        _atualizar(id_tarefa, estado='falhou', erro=f"Falha na atualização: {exc}",
+                   detalhes=traceback.format_exc(), fim=datetime.now())
+        return
+
+    if resumo is None:
+        _atualizar(id_tarefa, estado='falhou', fim=datetime.now(),
+                   erro="Não foi possível ler as exportações do Optimus. Verifique os arquivos em 'dados/'.")
+    else:
+        _atualizar(id_tarefa, estado='concluída', percentual=100, texto='Processamento concluído.',
+                   resumo=resumo, fim=datetime.now())
@@ -17,16 +17,26 @@ Módulo unificado com funções organizadas em seções lógicas:
 # - `tempo_para_minutos`
 # - `minutos_para_hhhmm`
 # - `parse_time`
+# - `horas_para_timedelta`
 # - `combinar_data_hora`
 # - `calcular_tempo`
+# - `duracao_em_minutos`
+# - `arredondar_horas`
+# - `serie_minutos_para_hhhmm`
 # ===============================
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 import unicodedata
 import time
+import zipfile
+import logging
 from pathlib import Path
 import streamlit as st
+from config import TEMA
+
+log = logging.getLogger(__name__)
 
 def tempo_para_minutos(tempo: str) -> int:
     """Converte tempo no formato 'HH:MM' para minutos inteiros."""
@@ -51,12 +61,19 @@ def parse_time(time_str: str) -> Optional[datetime.time]:
             continue
     return None
 
+def horas_para_timedelta(hora_col: pd.Series) -> pd.Series:
+    """Converte coluna de horas ('HH:MM:SS' ou 'HH:MM') em Timedelta, sem laço por linha.
+
+    Células vazias ou inválidas viram 00:00:00, como em `parse_time` + `combinar_data_hora`.
+    """
+    texto = hora_col.astype(str).str.strip()
+    horas = pd.to_datetime(texto, format='%H:%M:%S', errors='coerce')
+    horas = horas.fillna(pd.to_datetime(texto, format='%H:%M', errors='coerce'))
+    return (horas - horas.dt.normalize()).fillna(pd.Timedelta(0))
+
 def combinar_data_hora(data_col, hora_col) -> pd.Series:
-    return pd.to_datetime(
-        data_col.dt.strftime('%d/%m/%Y') + ' ' +
-        hora_col.apply(lambda t: t.strftime('%H:%M:%S') if t else "00:00:00"),
-        format='%d/%m/%Y %H:%M:%S'
-    )
+    """Soma a data (sem hora) com a hora da coluna correspondente. Datas vazias resultam em NaT."""
+    return data_col.dt.normalize() + horas_para_timedelta(hora_col)
 
 def calcular_tempo(delta) -> Optional[str]:
     if not isinstance(delta, pd.Timedelta) or pd.isnull(delta):
@@ -66,6 +83,28 @@ def calcular_tempo(delta) -> Optional[str]:
     minutos = int((total_seconds % 3600) // 60)
     return f"{horas:03}:{minutos:02}"
 
+def duracao_em_minutos(delta: pd.Series) -> pd.Series:
+    """Converte uma coluna de Timedelta em minutos inteiros (os segundos são truncados, como no
+    'HHH:MM'), em uma única operação. NaT vira NaN. Formatada por `serie_minutos_para_hhhmm`,
+    equivale a `calcular_tempo`."""
+    return np.floor(delta.dt.total_seconds() / 60)
+
+def arredondar_horas(horas) -> np.ndarray:
+    """Arredonda médias em horas para 2 casas com o `round` do Python, como as métricas sempre
+    foram arredondadas (o `np.round` multiplica por 100 e desempata para o par)."""
+    return np.array([round(float(h), 2) for h in horas], dtype='float64')
+
+def serie_minutos_para_hhhmm(minutos: pd.Series, vazio: Optional[str] = "000:00") -> pd.Series:
+    """Versão vetorizada de `minutos_para_hhhmm`: formata a coluna de minutos como 'HHH:MM'.
+    Valores ausentes viram `vazio`."""
+    inteiros = pd.to_numeric(minutos).astype(float) // 1
+    validos = inteiros.notna()
+    horas = (inteiros[validos] // 60).astype('int64').astype(str).str.zfill(3)
+    resto = (inteiros[validos] % 60).astype('int64').astype(str).str.zfill(2)
+    resultado = pd.Series([vazio] * len(minutos), index=minutos.index, dtype=object)
+    resultado[validos] = horas + ':' + resto
+    return resultado
+
 
 # ===============================
 # 🧹 Formatação
@@ -147,9 +186,34 @@ def gravacsv(df: pd.DataFrame, output_file_name: str):
 # - `criar_multiselect_filtro`
 # ===============================
 
+TEMAS = ('light', 'dark')
+
 def detectar_tema():
+    """
+    Tema do app ('light' ou 'dark'), sem esperar o navegador sempre que possível:
+    1. `?tema=light|dark` na URL ou `TEMA` em config.py fixam o tema (sem JavaScript);
+    2. o tema que o próprio navegador informa a cada execução (`st.context.theme`);
+    3. o tema já detectado nesta sessão;
+    4. uma consulta JavaScript, só até a primeira resposta da sessão; enquanto ela não chega, 'light'.
+    """
+    tema = st.query_params.get('tema') or TEMA
+    if tema in TEMAS:
+        return tema
+
+    contexto = getattr(getattr(st, 'context', None), 'theme', None)
+    tema = getattr(contexto, 'type', None)
+    if tema in TEMAS:
+        st.session_state['tema'] = tema
+        return tema
+    if st.session_state.get('tema') in TEMAS:
+        return st.session_state['tema']
+
     from streamlit_javascript import st_javascript
-    return st_javascript("window.matchMedia && window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light'")
+    tema = st_javascript("window.matchMedia && window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light'")
+    if tema in TEMAS:
+        st.session_state['tema'] = tema
+        return tema
+    return 'light'
 
 def criar_select_filtro(df, coluna, label, incluir_todos=True):
     opcoes = sorted(df[coluna].dropna().unique().tolist())
@@ -233,19 +297,183 @@ def aggrid_ptbr():
 # 📁 Arquivos
 # -------------------------------
 # - `load_excel`
+# - `emissao_exportacao`
+# - `ler_excel_em_lotes`
 # - `last_access`
 # ===============================
 
-def load_excel(file_name: str) -> Optional[pd.DataFrame]:
+LINHA_CABECALHO = 6  # As exportações do Optimus trazem 6 linhas de título antes do cabeçalho
+
+def _inferir_tipo(valores: list) -> pd.Series:
+    """Aplica à coluna lida a mesma inferência do `pd.read_excel`: vazio vira NaN, números e datas são tipados."""
+    serie = pd.Series(valores, dtype=object)
+    serie = serie.mask(serie.isna() | (serie == ''))
+    if serie.isna().all():
+        return serie.astype(float)
+    numerica = pd.to_numeric(serie, errors='coerce')
+    if numerica.notna().sum() == serie.notna().sum():
+        return numerica
+    if pd.api.types.infer_dtype(serie, skipna=True) == 'datetime':
+        return pd.to_datetime(serie)
+    return serie
+
+def _emissao(linhas_titulo) -> Optional[str]:
+    """
+    Data de emissão ("Emissão: dd/mm/aaaa hh:mm:ss") das linhas de título da exportação, em ISO
+    (texto ordenável, que pode ir para os metadados do Parquet junto com `df.attrs`).
+    """
+    for linha in linhas_titulo:
+        valores = [v for v in linha if v is not None and str(v).strip()]
+        for rotulo, valor in zip(valores, valores[1:]):
+            if str(rotulo).strip() == 'Emissão:':
+                emissao = pd.to_datetime(valor, format='%d/%m/%Y %H:%M:%S', errors='coerce')
+                return None if pd.isna(emissao) else emissao.isoformat()
+    return None
+
+def _montar_bloco(nomes: list, linhas: list) -> pd.DataFrame:
+    return pd.DataFrame({nome: _inferir_tipo([linha[j] for linha in linhas]) for j, nome in enumerate(nomes)})
+
+def _blocos_xlsx(file_path: Path, colunas: Optional[list], tamanho: Optional[int], leitura: dict) -> Iterator[pd.DataFrame]:
+    """
+    Lê a primeira planilha em modo somente leitura, linha a linha, guardando apenas as
+    colunas pedidas, e gera blocos de até `tamanho` linhas (None = um bloco só).
+    Descarta as linhas de título, as linhas vazias e a linha de resumo final; o resumo da
+    leitura vai sendo acumulado em `leitura`.
+    """
+    from openpyxl import load_workbook
+
+    with open(file_path, 'rb') as arquivo:  # via arquivo aberto, aceita exportações .xls em formato xlsx
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            planilha = wb.worksheets[0]
+            linhas = planilha.iter_rows(values_only=True)
+            titulo = [linha for _, linha in zip(range(LINHA_CABECALHO), linhas)]
+            cabecalho = [str(c).strip() if c is not None else '' for c in next(linhas, ())]
+            if colunas is None:
+                indices = [i for i, nome in enumerate(cabecalho) if nome]
+            else:
+                indices = [cabecalho.index(nome) for nome in colunas if nome in cabecalho]
+            nomes = [cabecalho[i] for i in indices]
+            leitura.update({
+                'linhas': 0,
+                'linhas_ignoradas': LINHA_CABECALHO,
+                'colunas': len(indices),
+                'colunas_ignoradas': len([c for c in cabecalho if c]) - len(indices),
+                'emissao': _emissao(titulo),
+                'linhas_estimadas': max((planilha.max_row or 0) - LINHA_CABECALHO - 2, 0),
+            })
+
+            # A última linha só é emitida quando chega a seguinte: a linha final é o resumo
+            bloco, anterior, emitidos = [], None, 0
+            for linha in linhas:
+                if all(v is None for v in linha):
+                    leitura['linhas_ignoradas'] += 1
+                    continue
+                if anterior is not None:
+                    bloco.append(anterior)
+                    if tamanho is not None and len(bloco) == tamanho:
+                        leitura['linhas'] += len(bloco)
+                        emitidos += 1
+                        yield _montar_bloco(nomes, bloco)
+                        bloco = []
+                anterior = tuple(linha[i] if i < len(linha) else None for i in indices)
+        finally:
+            wb.close()
+
+    resumo = [anterior] if anterior is not None else []  # linha de resumo ("Relatório gerado em ...")
+    leitura['linhas_ignoradas'] += len(resumo)
+    leitura['linhas'] += len(bloco)
+    if tamanho is None:
+        # Bloco único: como no `pd.read_excel`, o resumo entra na inferência dos tipos e só então sai
+        yield _montar_bloco(nomes, bloco + resumo).iloc[:len(bloco)]
+    elif bloco or not emitidos:
+        yield _montar_bloco(nomes, bloco)
+
+def _ler_xlsx_streaming(file_path: Path, colunas: Optional[list]) -> pd.DataFrame:
+    """Lê a planilha inteira em um bloco (ver `_blocos_xlsx`), com o resumo em `df.attrs['leitura']`."""
+    leitura = {}
+    df = next(_blocos_xlsx(file_path, colunas, None, leitura))
+    leitura.pop('linhas_estimadas')
+    df.attrs['leitura'] = leitura
+    return df
+
+def load_excel(file_name: str, colunas: Optional[list] = None) -> Optional[pd.DataFrame]:
+    """
+    Carrega a exportação do Optimus (cabeçalho na linha 7, linha de resumo no fim).
+    Args:
+        file_name (str): Nome do arquivo dentro de `dados/`.
+        colunas (list): Colunas a materializar; None carrega todas.
+    Returns:
+        pd.DataFrame: Dados lidos, com o resumo da leitura em `df.attrs['leitura']`,
+        ou None em caso de erro (registrado no log, já que a leitura roda fora da sessão do Streamlit).
+    """
     file_path = Path('dados') / file_name
+    try:
+        return _ler_xlsx_streaming(file_path, colunas)
+    except (zipfile.BadZipFile, KeyError):
+        pass  # .xls binário (BIFF): segue pelo leitor do pandas
+    except Exception as e:
+        log.error("Erro ao processar o arquivo '%s': %s", file_name, e)
+        return None
     try:
         xls = pd.ExcelFile(file_path)
-        df = xls.parse(xls.sheet_names[0], header=6)
+        df = xls.parse(xls.sheet_names[0], header=LINHA_CABECALHO,
+                       usecols=(lambda c: c in colunas) if colunas is not None else None)
         return df.iloc[:-1].reset_index(drop=True)
     except Exception as e:
-        st.error(f"Erro ao processar o arquivo '{file_name}': {e}")
+        log.error("Erro ao processar o arquivo '%s': %s", file_name, e)
         return None
 
-def last_access(file_name: str) -> str:
-    caminho_arquivo = Path('dados') / file_name
+def emissao_exportacao(file_name: str) -> Optional[str]:
+    """Data de emissão (ISO) da exportação do Optimus, lida só das linhas de título (None se não houver)."""
+    from openpyxl import load_workbook
+
+    try:
+        with open(Path('dados') / file_name, 'rb') as arquivo:
+            wb = load_workbook(arquivo, read_only=True, data_only=True)
+            try:
+                linhas = wb.worksheets[0].iter_rows(values_only=True, max_row=LINHA_CABECALHO)
+                return _emissao(linhas)
+            finally:
+                wb.close()
+    except Exception:
+        return None  # .xls binário ou arquivo ilegível: a leitura em si reporta o erro
+
+def ler_excel_em_lotes(file_name: str, colunas: Optional[list], lote: int, leitura: dict) -> Iterator[pd.DataFrame]:
+    """
+    Lê a exportação do Optimus em blocos de até `lote` linhas, sem carregar a planilha inteira.
+    Os tipos são inferidos bloco a bloco; quem consome os blocos normaliza as colunas.
+    Args:
+        file_name (str): Nome do arquivo dentro de `dados/`.
+        colunas (list): Colunas a materializar; None carrega todas.
+        lote (int): Linhas por bloco.
+        leitura (dict): Recebe o resumo da leitura (linhas, colunas, 'linhas_estimadas' já
+            antes do primeiro bloco) e, se a leitura falhar, a mensagem em 'erro'.
+    """
+    file_path = Path('dados') / file_name
+    try:
+        yield from _blocos_xlsx(file_path, colunas, lote, leitura)
+        return
+    except (zipfile.BadZipFile, KeyError) as e:
+        erro = e if leitura else None  # sem cabeçalho lido: .xls binário (BIFF), lido adiante
+    except Exception as e:
+        erro = e
+    if erro is not None:
+        log.error("Erro ao processar o arquivo '%s': %s", file_name, erro)
+        leitura['erro'] = str(erro)
+        return
+
+    # O leitor do pandas não lê o .xls binário por partes: a planilha é lida inteira e fatiada
+    df = load_excel(file_name, colunas)
+    if df is None:
+        leitura['erro'] = f"Erro ao processar o arquivo '{file_name}'"
+        return
+    leitura.update({'linhas': len(df), 'linhas_estimadas': len(df)})
+    for inicio in range(0, max(len(df), 1), lote):
+        yield df.iloc[inicio:inicio + lote].reset_index(drop=True)
+
+def last_access(file_name: str | Path) -> str:
+    caminho_arquivo = file_name if isinstance(file_name, Path) else Path('dados') / file_name
+    if not caminho_arquivo.exists():
+        return 'sem dados'
     return time.strftime('%d/%m/%Y', time.localtime(caminho_arquivo.stat().st_mtime))
@@ -1,6 +1,6 @@
 import streamlit as st
-import streamlit_javascript as st_javascript
 from config import *
+from utils.tools import detectar_tema
 
 def load_css():
     """Carrega o conteúdo do arquivo CSS.
@@ -14,36 +14,6 @@ def load_css():
     except FileNotFoundError:
         return "/* CSS file not found */"
     
-def detectar_tema():
-    """
-    Detecta o tema atual (claro ou escuro) em uma aplicação Streamlit.
-    Este método injeta um elemento HTML oculto no DOM com a cor de fundo do tema atual
-    e utiliza JavaScript para obter a cor computada. Com base na cor RGB obtida, 
-    determina se o tema é escuro ou claro.
-    Returns:
-        str: "dark" se o tema for escuro, "light" se o tema for claro.
-    """
-    # Injeta um div oculto com a cor de fundo do tema atual
-    st.markdown("""
-        <div id="theme-detector" style="background-color: var(--background-color); display:none;"></div>
-    """, unsafe_allow_html=True)
-
-    # JavaScript pega a cor computada do background
-
-    cor_fundo = st_javascript(""" 
-        const elem = window.parent.document.getElementById("theme-detector");
-        const color = window.getComputedStyle(elem).backgroundColor;
-        color;
-    """)
-
-    # Analisa se é tema escuro baseado na cor RGB
-    if cor_fundo and isinstance(cor_fundo, str):
-        if "rgb(0, 0, 0" in cor_fundo or "rgb(1, 1, 1" in cor_fundo:  # preto ou quase preto
-            return "dark"
-        else:
-            return "light"
-    return "light"  # fallba
-
 def _ajustar_sidebar() -> None:
     """Ajusta o estilo da barra lateral."""
     st.markdown(